@@ -0,0 +1,39 @@
+"""add change_log table
+
+Revision ID: change_log
+Revises: jobs
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'change_log'
+down_revision = 'jobs'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Versioned log of well and production writes served by /changes
+    op.create_table(
+        'change_log',
+        sa.Column('version', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=True),
+        sa.Column('op', sa.String(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('version')
+    )
+    
+    # Create indexes
+    op.create_index(op.f('ix_change_log_created_at'), 'change_log', ['created_at'], unique=False)
+    op.create_index('ix_change_log_entity', 'change_log', ['entity', 'entity_id'], unique=False)
+
+def downgrade() -> None:
+    # Drop indexes
+    op.drop_index('ix_change_log_entity', table_name='change_log')
+    op.drop_index(op.f('ix_change_log_created_at'), table_name='change_log')
+    
+    # Drop table
+    op.drop_table('change_log')
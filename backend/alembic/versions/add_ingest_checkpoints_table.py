@@ -0,0 +1,41 @@
+"""add ingest_checkpoints table
+
+Revision ID: ingest
+Revises: sketches
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'ingest'
+down_revision = 'sketches'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Byte offset and head hash of each file in the ingest drop folder
+    op.create_table(
+        'ingest_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('offset', sa.BigInteger(), nullable=False),
+        sa.Column('head_hash', sa.String(), nullable=True),
+        sa.Column('header', sa.String(), nullable=True),
+        sa.Column('rows_ingested', sa.BigInteger(), nullable=False),
+        sa.Column('rows_rejected', sa.BigInteger(), nullable=False),
+        sa.Column('busy_seconds', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('path')
+    )
+    
+    # Create indexes
+    op.create_index(op.f('ix_ingest_checkpoints_id'), 'ingest_checkpoints', ['id'], unique=False)
+
+def downgrade() -> None:
+    # Drop indexes
+    op.drop_index(op.f('ix_ingest_checkpoints_id'), table_name='ingest_checkpoints')
+    
+    # Drop table
+    op.drop_table('ingest_checkpoints')
@@ -0,0 +1,51 @@
+"""add production_cumulative table
+
+Revision ID: cumulative
+Revises: tables
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'cumulative'
+down_revision = 'tables'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Running oil, gas and water totals per well and production date
+    op.create_table(
+        'production_cumulative',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('well_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('cum_oil', sa.Float(), nullable=False),
+        sa.Column('cum_gas', sa.Float(), nullable=False),
+        sa.Column('cum_water', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['well_id'], ['wells.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('well_id', 'date', name='uq_production_cumulative_well_date')
+    )
+
+    # Create indexes
+    op.create_index(op.f('ix_production_cumulative_id'), 'production_cumulative', ['id'], unique=False)
+
+    # One production row per well and day; of existing duplicates the latest row wins
+    op.execute(
+        "DELETE FROM production_data WHERE id NOT IN "
+        "(SELECT max(id) FROM production_data GROUP BY well_id, date)"
+    )
+    with op.batch_alter_table('production_data') as batch_op:
+        batch_op.create_unique_constraint('uq_production_data_well_date', ['well_id', 'date'])
+
+def downgrade() -> None:
+    # Drop constraints
+    with op.batch_alter_table('production_data') as batch_op:
+        batch_op.drop_constraint('uq_production_data_well_date', type_='unique')
+
+    # Drop indexes
+    op.drop_index(op.f('ix_production_cumulative_id'), table_name='production_cumulative')
+
+    # Drop table
+    op.drop_table('production_cumulative')
@@ -0,0 +1,56 @@
+"""add production_sketches and production_sketch_deltas tables
+
+Revision ID: sketches
+Revises: change_log
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'sketches'
+down_revision = 'change_log'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Per-region, per-month KLL and HyperLogLog sketches of daily oil volumes
+    op.create_table(
+        'production_sketches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('region', sa.String(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('oil_quantiles', sa.LargeBinary(), nullable=False),
+        sa.Column('producing_wells', sa.LargeBinary(), nullable=False),
+        sa.Column('stale', sa.Boolean(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('region', 'month', name='uq_production_sketches_region_month')
+    )
+    
+    # Sketches of newly written rows waiting for the merge_sketches job
+    op.create_table(
+        'production_sketch_deltas',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('region', sa.String(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('oil_quantiles', sa.LargeBinary(), nullable=False),
+        sa.Column('producing_wells', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # Create indexes
+    op.create_index(op.f('ix_production_sketches_id'), 'production_sketches', ['id'], unique=False)
+    op.create_index(op.f('ix_production_sketch_deltas_id'), 'production_sketch_deltas', ['id'], unique=False)
+    op.create_index('ix_production_sketch_deltas_region_month', 'production_sketch_deltas', ['region', 'month'], unique=False)
+
+def downgrade() -> None:
+    # Drop indexes
+    op.drop_index('ix_production_sketch_deltas_region_month', table_name='production_sketch_deltas')
+    op.drop_index(op.f('ix_production_sketch_deltas_id'), table_name='production_sketch_deltas')
+    op.drop_index(op.f('ix_production_sketches_id'), table_name='production_sketches')
+    
+    # Drop tables
+    op.drop_table('production_sketch_deltas')
+    op.drop_table('production_sketches')
@@ -0,0 +1,61 @@
+"""rename well and productiondata tables
+
+Revision ID: tables
+Revises: ingest
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'tables'
+down_revision = 'ingest'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # The models' tables are wells and production_data; init_db's create_all may have
+    # created them next to the initial migration's unused well and productiondata
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'wells' in tables:
+        op.drop_table('productiondata')
+        op.drop_table('well')
+        return
+
+    # Drop indexes
+    op.drop_index(op.f('ix_productiondata_well_id'), table_name='productiondata')
+    op.drop_index(op.f('ix_productiondata_date'), table_name='productiondata')
+    op.drop_index(op.f('ix_well_name'), table_name='well')
+
+    # Rename tables
+    op.rename_table('well', 'wells')
+    op.rename_table('productiondata', 'production_data')
+    op.add_column('wells', sa.Column('region', sa.String(), nullable=True))
+
+    # Create indexes
+    op.create_index(op.f('ix_wells_id'), 'wells', ['id'], unique=False)
+    op.create_index(op.f('ix_wells_name'), 'wells', ['name'], unique=True)
+    op.create_index(op.f('ix_wells_region'), 'wells', ['region'], unique=False)
+    op.create_index(op.f('ix_production_data_id'), 'production_data', ['id'], unique=False)
+    op.create_index(op.f('ix_production_data_date'), 'production_data', ['date'], unique=False)
+    op.create_index(op.f('ix_production_data_well_id'), 'production_data', ['well_id'], unique=False)
+
+def downgrade() -> None:
+    # Drop indexes
+    op.drop_index(op.f('ix_production_data_well_id'), table_name='production_data')
+    op.drop_index(op.f('ix_production_data_date'), table_name='production_data')
+    op.drop_index(op.f('ix_production_data_id'), table_name='production_data')
+    op.drop_index(op.f('ix_wells_region'), table_name='wells')
+    op.drop_index(op.f('ix_wells_name'), table_name='wells')
+    op.drop_index(op.f('ix_wells_id'), table_name='wells')
+
+    # Rename tables
+    with op.batch_alter_table('wells') as batch_op:
+        batch_op.drop_column('region')
+    op.rename_table('production_data', 'productiondata')
+    op.rename_table('wells', 'well')
+
+    # Create indexes
+    op.create_index(op.f('ix_well_name'), 'well', ['name'], unique=False)
+    op.create_index(op.f('ix_productiondata_date'), 'productiondata', ['date'], unique=False)
+    op.create_index(op.f('ix_productiondata_well_id'), 'productiondata', ['well_id'], unique=False)
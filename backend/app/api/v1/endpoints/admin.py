@@ -0,0 +1,47 @@
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.admission import admission_controller
+from app.db.deps import get_db
+from app.db.instrumentation import clear_slow_queries, slow_queries
+from app.services.ingest import ingest_status
+from app.services.singleflight import read_coalescer
+
+router = APIRouter()
+
+@router.get("/slow-queries", response_model=List[Dict[str, Any]])
+def read_slow_queries():
+    """
+    Recent statements slower than SLOW_QUERY_THRESHOLD_MS, newest first, with their plans.
+    """
+    return slow_queries()
+
+@router.delete("/slow-queries")
+def delete_slow_queries():
+    """
+    Clear the slow-query buffer.
+    """
+    clear_slow_queries()
+    return {"ok": True}
+
+@router.get("/admission", response_model=Dict[str, Any])
+def read_admission_metrics():
+    """
+    Admission-control budgets, in-flight requests, queue depth and shed counts per lane.
+    """
+    return admission_controller.metrics()
+
+@router.get("/coalescing", response_model=Dict[str, int])
+def read_coalescing_metrics():
+    """
+    Read-request coalescing: queries executed versus requests served from a shared in-flight result.
+    """
+    return read_coalescer.metrics()
+
+@router.get("/ingest", response_model=Dict[str, Any])
+def read_ingest_status(db: Session = Depends(get_db)):
+    """
+    Drop-folder ingestion: per-file offsets, bytes still to read, lag and throughput.
+    """
+    return ingest_status(db)
@@ -0,0 +1,41 @@
+from typing import List, Optional
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.logging import logger
+from app.db.deps import get_read_db
+from app.schemas.analytics import DistributionStats
+from app.services.sketches import distribution
+
+router = APIRouter()
+
+@router.get("/distribution", response_model=DistributionStats)
+def read_distribution(
+    db: Session = Depends(get_read_db),
+    regions: Optional[List[str]] = Query(None, description="Regions to include (default: all)"),
+    start_date: Optional[date] = Query(None, description="Start date, widened to the start of its month"),
+    end_date: Optional[date] = Query(None, description="End date, widened to the end of its month"),
+    quantiles: List[float] = Query([0.1, 0.5, 0.9], description="Quantiles of daily oil volume"),
+):
+    """
+    Approximate distribution of daily oil volumes and count of producing wells.
+
+    Computed by merging per-region, per-month sketches; see `error_bounds` for accuracy.
+    Rows inserted since the last `merge_sketches` run are included. `stale` is true when
+    an update or delete in the range has not been folded in yet by the scheduled
+    `rebuild_sketches` job.
+    """
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Quantiles must be between 0 and 1"
+        )
+    try:
+        return DistributionStats.model_validate(distribution(db, regions, start_date, end_date, quantiles))
+    except Exception as e:
+        logger.error(f"Error computing production distribution: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing production distribution: {str(e)}"
+        )
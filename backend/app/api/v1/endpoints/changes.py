@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.logging import logger
+from app.db.deps import get_read_db
+from app.schemas.change_log import Change, ChangeSet
+from app.services.changelog import read_changes
+
+router = APIRouter()
+
+@router.get("/", response_model=ChangeSet)
+def read_change_log(
+    db: Session = Depends(get_read_db),
+    since: int = Query(0, ge=0, description="Return changes after this version"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of changes"),
+):
+    """
+    Changes to wells and production data since a version, with the new high-water mark.
+
+    Pass the returned `version` as `since` on the next call; repeat while `has_more` is true.
+    `insert` and `update` carry the full row and should be applied as upserts; deleting
+    a well also deletes its production rows.
+    """
+    try:
+        changes, version, has_more = read_changes(db, since, limit)
+        return ChangeSet(
+            changes=[Change.model_validate(change) for change in changes],
+            version=version,
+            has_more=has_more,
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving changes: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving changes: {str(e)}"
+        )
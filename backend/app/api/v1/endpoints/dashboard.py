@@ -0,0 +1,44 @@
+from typing import Optional
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+
+from app.core.logging import logger
+from app.db.deps import get_read_db
+from app.schemas.dashboard import DashboardBundle
+from app.services.dashboard import build_dashboard
+from app.services.singleflight import read_coalescer
+
+router = APIRouter()
+
+@router.get("/", response_model=DashboardBundle)
+def read_dashboard(
+    db: Session = Depends(get_read_db),
+    region: Optional[str] = Query(None, description="Filter by region"),
+    well_name: Optional[str] = Query(None, description="Filter by well name"),
+    start_date: Optional[date] = Query(None, description="Filter by start date"),
+    end_date: Optional[date] = Query(None, description="Filter by end date"),
+    page_size: int = Query(100, ge=1, le=1000, description="Rows in the first table page"),
+):
+    """
+    Everything the dashboard renders for a set of filters, in one response.
+
+    Returns the matching wells, daily oil/gas/water sums (`series`), totals per region
+    and the first page of production rows, all read from one consistent database
+    snapshot. `version` is the change-log version the bundle reflects.
+    """
+    try:
+        key = ("dashboard", region, well_name, start_date, end_date, page_size, db.info.get("read_only"))
+        body = read_coalescer.do(
+            key,
+            lambda: build_dashboard(db, region, well_name, start_date, end_date, page_size),
+            share=not db.info.get("pinned"),
+        )
+        return Response(content=body, media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error building dashboard: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error building dashboard: {str(e)}"
+        )
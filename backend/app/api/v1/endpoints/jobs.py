@@ -0,0 +1,108 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.deps import get_db
+from app.models.job import Job as JobModel
+from app.schemas.job import Job, JobCreate
+from app.services.jobs import InvalidJobParams, JobQueueFull, job_runner, job_types
+from app.services import archive, changelog, cumulative, ingest, sketches, snapshot  # noqa: F401 - register their job types
+
+router = APIRouter()
+
+def _to_schema(job: JobModel) -> Job:
+    response = Job.model_validate(job)
+    if job.result_path:
+        response.result_url = f"{settings.API_V1_STR}/jobs/{job.id}/result"
+    return response
+
+def _get_job(db: Session, job_id: int) -> JobModel:
+    job = db.query(JobModel).filter(JobModel.id == job_id).first()
+    if not job:
+        logger.error(f"Job with ID {job_id} not found")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found"
+        )
+    return job
+
+@router.post("/", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+def submit_job(
+    *,
+    db: Session = Depends(get_db),
+    job_in: JobCreate,
+):
+    """
+    Submit a background job. Poll `GET /jobs/{id}` for its status.
+    """
+    try:
+        job = job_runner.submit(db, job_in.job_type, job_in.params)
+        return _to_schema(job)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown job type '{job_in.job_type}'. Available: {sorted(job_types())}"
+        )
+    except InvalidJobParams as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid params for job type '{job_in.job_type}': {str(e)}"
+        )
+    except JobQueueFull:
+        logger.warning(f"Job queue full, rejecting {job_in.job_type}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many pending jobs, try again later",
+            headers={"Retry-After": "30"},
+        )
+    except Exception as e:
+        logger.error(f"Error submitting job: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error submitting job: {str(e)}"
+        )
+
+@router.get("/{job_id}", response_model=Job)
+def read_job(
+    *,
+    db: Session = Depends(get_db),
+    job_id: int,
+):
+    """
+    Get job status, progress and result location.
+    """
+    return _to_schema(_get_job(db, job_id))
+
+@router.post("/{job_id}/cancel", response_model=Job)
+def cancel_job(
+    *,
+    db: Session = Depends(get_db),
+    job_id: int,
+):
+    """
+    Request cancellation of a queued or running job.
+    """
+    job = _get_job(db, job_id)
+    job = job_runner.cancel(db, job)
+    logger.info(f"Cancellation requested for job {job_id}")
+    return _to_schema(job)
+
+@router.get("/{job_id}/result")
+def download_job_result(
+    *,
+    db: Session = Depends(get_db),
+    job_id: int,
+):
+    """
+    Download the result file of a finished job.
+    """
+    job = _get_job(db, job_id)
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} has no result available"
+        )
+    return FileResponse(job.result_path, filename=os.path.basename(job.result_path))
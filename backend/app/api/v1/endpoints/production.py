@@ -1,21 +1,57 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import asyncio
+import json
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from datetime import date
 from app.core.logging import logger
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
-from app.db.deps import get_db
-from app.schemas.production import ProductionDataCreate, ProductionDataUpdate, ProductionDataResponse
+from app.db.deps import get_db, get_read_db
+from app.schemas.production import (
+    ProductionDataCreate,
+    ProductionDataUpdate,
+    ProductionDataResponse,
+    ProductionBatchUpdate,
+    ProductionBatchResult,
+    CumulativeProduction,
+)
 from app.models.production import ProductionData as ProductionDataModel
 from app.models.well import Well
+from app.services.production_service import (
+    bulk_update_volumes,
+    delete_production_range,
+    production_totals,
+    query_production_page,
+)
+from app.services.singleflight import read_coalescer
+from app.services.broadcaster import Subscription, broadcaster
+from app.services import cumulative
+from app.services.changelog import DELETE, INSERT, UPDATE, latest_version, production_payload, record_change
+from app.services.sketches import mark_stale, month_start, record_samples
+from app.db.session import SessionLocal
+from app.services.archive import ArchivedDateError, ensure_writable, not_archived, read_archived_production
+from app.core.config import settings
 
 router = APIRouter()
 
+_production_adapter = TypeAdapter(List[ProductionDataResponse])
+
+def _reject_archived(*days: Optional[date]) -> None:
+    try:
+        ensure_writable(*days)
+    except ArchivedDateError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
 @router.get("/", response_model=List[ProductionDataResponse])
 def read_production_data(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     region: Optional[str] = Query(None, description="Filter by region"),
@@ -25,40 +61,16 @@ def read_production_data(
 ):
     """
     Retrieve production data with well information and filtering options.
+
+    Rows from the database come first (ordered by date), followed by archived history.
+    Concurrent identical requests share one query and one serialized response.
     """
     try:
-        # Query production data with well information
-        query = (
-            db.query(ProductionDataModel, Well.name)
-            .join(Well, ProductionDataModel.well_id == Well.id)
-        )
-        
-        # Apply filters if provided
-        if region:
-            query = query.filter(Well.region == region)
-        if well_name:
-            query = query.filter(Well.name == well_name)
-        if start_date:
-            query = query.filter(ProductionDataModel.date >= start_date)
-        if end_date:
-            query = query.filter(ProductionDataModel.date <= end_date)
-        
-        # Apply pagination
-        query = query.offset(skip).limit(limit)
-        
-        results = query.all()
-        
-        # Convert to response model with well information
-        response_data = []
-        for prod, well_name in results:
-            response_data.append({
-                "well_name": well_name,
-                "date": prod.date,
-                "oil_volume": prod.oil_volume,
-                "region": prod.well.region if prod.well else None
-            })
-        
-        return response_data
+        key = ("production", region, well_name, start_date, end_date, skip, limit, db.info.get("read_only"))
+        body = read_coalescer.do(key, lambda: _production_adapter.dump_json(_production_adapter.validate_python(
+            query_production_page(db, region, well_name, start_date, end_date, skip, limit)
+        )), share=not db.info.get("pinned"))
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         logger.error(f"Error retrieving production data: {str(e)}")
         raise HTTPException(
@@ -84,6 +96,7 @@ def create_production_data(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Well with ID {production_in.well_id} not found"
             )
+        _reject_archived(production_in.date)
         
         # Check if a record already exists for this well and date
         existing_record = (
@@ -107,8 +120,23 @@ def create_production_data(
         db.add(production_data)
         
         try:
+            db.flush()
+            record_change(db, "production", INSERT, production_data.id, production_payload(production_data))
+            record_samples(db, [(well.region, production_data.date, well.id, production_data.oil_volume)])
+            cumulative.record_insert(
+                db, well.id, production_data.date,
+                production_data.oil_volume, production_data.gas_volume, production_data.water_volume,
+            )
             db.commit()
             db.refresh(production_data)
+        except IntegrityError:
+            # A concurrent request created the same well and date first
+            db.rollback()
+            logger.warning(f"Production data already exists for well_id={production_in.well_id} on date={production_in.date}")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Production data already exists for well_id={production_in.well_id} on date={production_in.date}"
+            )
         except Exception as e:
             db.rollback()
             logger.error(f"Database error when creating production data: {str(e)}")
@@ -141,16 +169,98 @@ def create_production_data(
             detail=f"Unexpected error creating production data: {str(e)}"
         )
 
+def _stream_start(
+    region: Optional[str],
+    well_name: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> Tuple[int, dict]:
+    """Change-log position followed by the totals; changes after the position are streamed."""
+    db = SessionLocal()
+    try:
+        return latest_version(db), production_totals(db, region, well_name, start_date, end_date)
+    finally:
+        db.close()
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@router.get("/stream")
+async def stream_production_data(
+    request: Request,
+    region: Optional[str] = Query(None, description="Filter by region"),
+    well_name: Optional[str] = Query(None, description="Filter by well name"),
+    start_date: Optional[date] = Query(None, description="Filter by start date"),
+    end_date: Optional[date] = Query(None, description="Filter by end date"),
+):
+    """
+    Server-Sent Events feed of production changes matching the filters.
+
+    Emits `aggregates` on connect and after every change, `upsert` and `delete`
+    for changed rows, and `resync` when a batch operation or a well rename or
+    region change touched rows the client should re-fetch. Changes are read from
+    the change log, so writes made by any worker or the ingest daemon are streamed.
+    A `: keep-alive` comment is sent every STREAM_HEARTBEAT_SECONDS.
+    """
+    subscription = Subscription(region=region, well_name=well_name, start_date=start_date, end_date=end_date)
+    filters = (region, well_name, start_date, end_date)
+    try:
+        subscription.since, totals = await run_in_threadpool(_stream_start, *filters)
+    except Exception as e:
+        logger.error(f"Error opening production stream: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error opening production stream: {str(e)}"
+        )
+    broadcaster.subscribe(subscription)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        keep_alive_at = loop.time() + settings.STREAM_HEARTBEAT_SECONDS
+        try:
+            yield _sse("aggregates", totals)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=max(keep_alive_at - loop.time(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    event = None
+                if loop.time() >= keep_alive_at:
+                    # Sent on schedule even while changes flow, so proxies never see a quiet connection
+                    yield ": keep-alive\n\n"
+                    keep_alive_at = loop.time() + settings.STREAM_HEARTBEAT_SECONDS
+                if event is None:
+                    continue
+                if event["type"] == "aggregates":
+                    yield _sse("aggregates", event["totals"])
+                elif event["type"] == "resync":
+                    yield _sse("resync", {"start_date": event.get("start_date"), "end_date": event.get("end_date")})
+                    if event.get("reason") == "overflow":
+                        # The aggregates queued with the dropped events are gone too
+                        _, totals = await run_in_threadpool(_stream_start, *filters)
+                        yield _sse("aggregates", totals)
+                else:
+                    yield _sse(event["type"], event["row"])
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/well/{well_id}", response_model=List[ProductionDataResponse])
 def read_well_production(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     well_id: int,
     start_date: date = None,
     end_date: date = None,
 ):
     """
-    Get production data for a specific well with region information.
+    Get production data for a specific well with region information, including archived history.
     """
     try:
         # Check if well exists
@@ -165,7 +275,7 @@ def read_well_production(
         query = (
             db.query(ProductionDataModel, Well.region)
             .join(Well, ProductionDataModel.well_id == Well.id)
-            .filter(ProductionDataModel.well_id == well_id)
+            .filter(ProductionDataModel.well_id == well_id, not_archived())
         )
         
         if start_date:
@@ -174,7 +284,18 @@ def read_well_production(
             query = query.filter(ProductionDataModel.date <= end_date)
             
         results = query.all()
+        archived = read_archived_production(
+            db, well_id=well_id, start_date=start_date, end_date=end_date
+        )
         return [
+            ProductionDataResponse(
+                well_name=row["well_name"],
+                date=row["date"],
+                oil_volume=row["oil_volume"],
+                region=row["region"]
+            )
+            for row in archived
+        ] + [
             ProductionDataResponse(
                 well_name=prod.well.name,
                 date=prod.date,
@@ -192,6 +313,104 @@ def read_well_production(
             detail=f"Error retrieving well production data: {str(e)}"
         )
 
+@router.get("/cumulative", response_model=CumulativeProduction)
+def read_cumulative_production(
+    db: Session = Depends(get_read_db),
+    well_id: Optional[int] = Query(None, description="Filter by well ID"),
+    well_name: Optional[str] = Query(None, description="Filter by well name"),
+    region: Optional[str] = Query(None, description="Filter by region"),
+    start_date: Optional[date] = Query(None, description="First day of the range (default: start of history)"),
+    end_date: Optional[date] = Query(None, description="Last day of the range (default: latest production)"),
+):
+    """
+    Oil, gas and water produced per well between two dates (inclusive), archived history included.
+
+    Leave out `start_date` for cumulative production as of `end_date`. Each well's total
+    comes from two lookups in the cumulative index, independent of the length of its history.
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="start_date must not be after end_date"
+        )
+    try:
+        wells = cumulative.range_totals(db, well_id, well_name, region, start_date, end_date)
+        return CumulativeProduction(
+            start_date=start_date,
+            end_date=end_date,
+            oil_volume=sum(well["oil_volume"] for well in wells),
+            gas_volume=sum(well["gas_volume"] for well in wells),
+            water_volume=sum(well["water_volume"] for well in wells),
+            wells=wells,
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving cumulative production: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving cumulative production: {str(e)}"
+        )
+
+@router.put("/batch", response_model=ProductionBatchResult)
+def batch_update_production_data(
+    *,
+    db: Session = Depends(get_db),
+    batch_in: ProductionBatchUpdate,
+):
+    """
+    Update volumes for many (well_id, date) records in a single statement.
+    """
+    try:
+        rows_affected = bulk_update_volumes(db, batch_in.items)
+        db.commit()
+        logger.info(f"Batch updated {rows_affected} production records")
+        return ProductionBatchResult(rows_affected=rows_affected)
+    except ArchivedDateError as e:
+        db.rollback()
+        logger.warning(str(e))
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error batch updating production data: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error batch updating production data: {str(e)}"
+        )
+
+@router.delete("/batch", response_model=ProductionBatchResult)
+def batch_delete_production_data(
+    *,
+    db: Session = Depends(get_db),
+    well_id: int = Query(..., description="Well whose production data is deleted"),
+    start_date: Optional[date] = Query(None, description="Delete from this date (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Delete up to this date (inclusive)"),
+):
+    """
+    Delete a well's production data within a date range in a single statement.
+    """
+    try:
+        if start_date and end_date and start_date > end_date:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="start_date must not be after end_date"
+            )
+        rows_affected = delete_production_range(db, well_id, start_date, end_date)
+        db.commit()
+        logger.info(f"Deleted {rows_affected} production records for well_id={well_id}")
+        return ProductionBatchResult(rows_affected=rows_affected)
+    except HTTPException:
+        raise
+    except ArchivedDateError as e:
+        db.rollback()
+        logger.warning(str(e))
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error deleting production data range: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting production data range: {str(e)}"
+        )
+
 @router.put("/{production_id}", response_model=ProductionDataResponse)
 def update_production_data(
     *,
@@ -220,6 +439,33 @@ def update_production_data(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Well with ID {production_in.well_id} not found"
                 )
+        _reject_archived(production_in.date)
+        
+        target_key = (
+            production_in.well_id if production_in.well_id is not None else production.well_id,
+            production_in.date if production_in.date is not None else production.date,
+        )
+        if target_key != (production.well_id, production.date) and (
+            db.query(ProductionDataModel.id)
+            .filter(ProductionDataModel.well_id == target_key[0], ProductionDataModel.date == target_key[1])
+            .first()
+        ):
+            logger.warning(f"Production data already exists for well_id={target_key[0]} on date={target_key[1]}")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Production data already exists for well_id={target_key[0]} on date={target_key[1]}"
+            )
+        
+        previous_well = production.well
+        previous_key = (production.well_id, production.date)
+        previous = {
+            "well_name": previous_well.name,
+            "region": previous_well.region,
+            "date": production.date,
+            "oil_volume": production.oil_volume,
+            "gas_volume": production.gas_volume,
+            "water_volume": production.water_volume,
+        }
         
         # Update production data fields
         for field, value in production_in.model_dump(exclude_unset=True).items():
@@ -227,8 +473,39 @@ def update_production_data(
         
         try:
             db.add(production)
+            db.flush()
+            change = production_payload(production)
+            if (production.well_id, production.date) != previous_key:
+                # Lets consumers drop the row from its old well and date
+                change["previous"] = {"well_id": previous_key[0], "date": previous_key[1].isoformat()}
+            record_change(db, "production", UPDATE, production.id, change)
+            mark_stale(db, [previous["region"]], previous["date"], previous["date"])
+            region = db.query(Well.region).filter(Well.id == production.well_id).scalar()
+            if (region, month_start(production.date)) != (previous["region"], month_start(previous["date"])):
+                # The old month's rebuild drops the row; its new month only needs the sample added
+                record_samples(db, [(region, production.date, production.well_id, production.oil_volume)])
+            if (production.well_id, production.date) == previous_key:
+                cumulative.record_update(db, production.well_id, production.date, *(
+                    (getattr(production, column) or 0.0) - (previous[column] or 0.0)
+                    for column in ("oil_volume", "gas_volume", "water_volume")
+                ))
+            else:
+                cumulative.record_delete(
+                    db, *previous_key, previous["oil_volume"], previous["gas_volume"], previous["water_volume"]
+                )
+                cumulative.record_insert(
+                    db, production.well_id, production.date,
+                    production.oil_volume, production.gas_volume, production.water_volume,
+                )
             db.commit()
             db.refresh(production)
+        except IntegrityError:
+            db.rollback()
+            logger.warning(f"Production data already exists for well_id={target_key[0]} on date={target_key[1]}")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Production data already exists for well_id={target_key[0]} on date={target_key[1]}"
+            )
         except Exception as e:
             db.rollback()
             logger.error(f"Database error when updating production data: {str(e)}")
@@ -273,6 +550,12 @@ def delete_production_data(
             )
         
         try:
+            mark_stale(db, [production.well.region], production.date, production.date)
+            cumulative.record_delete(
+                db, production.well_id, production.date,
+                production.oil_volume, production.gas_volume, production.water_volume,
+            )
+            record_change(db, "production", DELETE, production_id, production_payload(production))
             db.delete(production)
             db.commit()
         except Exception as e:
@@ -282,7 +565,7 @@ def delete_production_data(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Database error when deleting production data: {str(e)}"
             )
-            
+        
         return {"ok": True}
     except HTTPException:
         raise
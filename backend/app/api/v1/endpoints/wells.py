@@ -1,28 +1,44 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
-from app.db.deps import get_db
+from app.db.deps import get_db, get_read_db
 from app.schemas.well import WellCreate, WellUpdate, Well, WellResponse
 from app.models.well import Well as WellModel
 from app.core.logging import logger
+from app.services.production_service import delete_well_cascade
+from app.services.changelog import INSERT, UPDATE, record_change, well_payload
+from app.services.sketches import move_well_samples
+from app.services.snapshot import fresh_snapshot
+from app.services.singleflight import read_coalescer
+from app.core.config import settings
 
 router = APIRouter()
 
+_wells_adapter = TypeAdapter(List[WellResponse])
+
 @router.get("/", response_model=List[WellResponse])
 def read_wells(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
 ):
     """
-    Retrieve wells.
+    Retrieve wells. Concurrent identical requests share one query and one serialized response.
     """
-    try:
+    def load() -> bytes:
+        snapshot = fresh_snapshot(db) if settings.SNAPSHOT_READS else None
+        if snapshot is not None:
+            return _wells_adapter.dump_json(_wells_adapter.validate_python(snapshot.read_wells(skip, limit)))
         wells = db.query(WellModel).offset(skip).limit(limit).all()
         logger.info(f"Retrieved {len(wells)} wells")
-        return wells
+        return _wells_adapter.dump_json(_wells_adapter.validate_python(wells, from_attributes=True))
+
+    try:
+        body = read_coalescer.do(("wells", skip, limit, db.info.get("read_only")), load, share=not db.info.get("pinned"))
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         logger.error(f"Error retrieving wells: {str(e)}")
         raise HTTPException(
@@ -52,6 +68,8 @@ def create_well(
         well = WellModel(**well_in.model_dump())
         db.add(well)
         try:
+            db.flush()
+            record_change(db, "well", INSERT, well.id, well_payload(well))
             db.commit()
             db.refresh(well)
             logger.info(f"Created new well: {well.name}")
@@ -81,7 +99,7 @@ def create_well(
 @router.get("/{well_id}", response_model=WellResponse)
 def read_well(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     well_id: int,
 ):
     """
@@ -135,11 +153,19 @@ def update_well(
                     detail=f"Well with name {well_in.name} already exists"
                 )
 
+        previous = {"name": well.name, "region": well.region}
         for field, value in well_in.model_dump(exclude_unset=True).items():
             setattr(well, field, value)
         
         try:
             db.add(well)
+            change = well_payload(well)
+            if (well.name, well.region) != (previous["name"], previous["region"]):
+                # Lets consumers move the well's rows out of the old name or region
+                change["previous"] = previous
+            record_change(db, "well", UPDATE, well.id, change)
+            if well.region != previous["region"]:
+                move_well_samples(db, well.id, previous["region"], well.region)
             db.commit()
             db.refresh(well)
             logger.info(f"Updated well: {well.name}")
@@ -173,7 +199,7 @@ def delete_well(
     well_id: int,
 ):
     """
-    Delete well.
+    Delete well and its production history.
     """
     try:
         well = db.query(WellModel).filter(WellModel.id == well_id).first()
@@ -185,10 +211,9 @@ def delete_well(
             )
 
         try:
-            db.delete(well)
-            db.commit()
-            logger.info(f"Deleted well with ID: {well_id}")
-            return {"ok": True}
+            deleted_rows = delete_well_cascade(db, well_id)
+            logger.info(f"Deleted well with ID: {well_id} and {deleted_rows} production records")
+            return {"ok": True, "production_rows_deleted": deleted_rows}
         except Exception as e:
             db.rollback()
             logger.error(f"Database error when deleting well: {str(e)}")
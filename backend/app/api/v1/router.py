@@ -1,8 +1,13 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import wells, production, chatbot
+from app.api.v1.endpoints import wells, production, chatbot, jobs, changes, admin, analytics, dashboard
 
 api_router = APIRouter()
 
 api_router.include_router(wells.router, prefix="/wells", tags=["wells"])
 api_router.include_router(production.router, prefix="/production", tags=["production"])
 api_router.include_router(chatbot.router, prefix="/chatbot", tags=["chatbot"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(changes.router, prefix="/changes", tags=["changes"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
@@ -0,0 +1,207 @@
+"""
+Admission control for API requests.
+
+Requests are classified as cheap reads, heavy reads (aggregations, exports) or
+writes. Each class has its own concurrency budget and bounded wait queue, and all
+classes share a total budget sized to the database pool. When a slot frees up,
+queued writes are admitted before reads and reads before heavy reads, so ingestion
+is not starved by dashboard traffic. Requests that cannot be queued, or wait
+longer than their class allows, are rejected at once with 503 and Retry-After.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+READ = "read"
+HEAVY = "heavy"
+WRITE = "write"
+PRIORITY = {WRITE: 0, READ: 1, HEAVY: 2}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@dataclass
+class Lane:
+    name: str
+    limit: int
+    max_queue: int
+    max_wait: float
+    in_flight: int = 0
+    queued: int = 0
+    admitted: int = 0
+    shed: int = 0
+
+
+class AdmissionController:
+    """
+    Event-loop-local counters; all methods run on the loop, so no locking is needed.
+    """
+
+    def __init__(self):
+        self.total_limit = settings.ADMISSION_TOTAL_CONCURRENCY
+        self.in_flight = 0
+        self.lanes = {
+            name: Lane(
+                name=name,
+                limit=settings.ADMISSION_LIMITS[name],
+                max_queue=settings.ADMISSION_QUEUE_SIZES[name],
+                max_wait=settings.ADMISSION_MAX_WAIT_SECONDS[name],
+            )
+            for name in PRIORITY
+        }
+        self._waiters: List[tuple] = []
+        self._sequence = itertools.count()
+
+    def _has_room(self, lane: Lane) -> bool:
+        return self.in_flight < self.total_limit and lane.in_flight < lane.limit
+
+    def _grant(self, lane: Lane) -> None:
+        self.in_flight += 1
+        lane.in_flight += 1
+        lane.admitted += 1
+
+    async def acquire(self, lane: Lane) -> bool:
+        """Wait for a slot in ``lane``; False means the request should be shed."""
+        # Don't overtake queued requests of equal or higher priority that are only
+        # waiting for the shared budget
+        overtaking = any(
+            other.queued and other.in_flight < other.limit and PRIORITY[other.name] <= PRIORITY[lane.name]
+            for other in self.lanes.values()
+        )
+        if self._has_room(lane) and not overtaking:
+            self._grant(lane)
+            return True
+        if lane.queued >= lane.max_queue:
+            lane.shed += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITY[lane.name], next(self._sequence), future, lane))
+        lane.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=lane.max_wait)
+            return True
+        except asyncio.TimeoutError:
+            if future.done():
+                # Granted just as the wait expired
+                return True
+            future.cancel()
+            lane.queued -= 1
+            lane.shed += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away while queued
+            if future.done():
+                self.release(lane)
+            else:
+                future.cancel()
+                lane.queued -= 1
+            raise
+
+    def release(self, lane: Lane) -> None:
+        self.in_flight -= 1
+        lane.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        deferred = []
+        while self._waiters and self.in_flight < self.total_limit:
+            entry = heapq.heappop(self._waiters)
+            _, _, future, lane = entry
+            if future.done():
+                continue
+            if lane.in_flight >= lane.limit:
+                deferred.append(entry)
+                continue
+            self._grant(lane)
+            lane.queued -= 1
+            future.set_result(True)
+        for entry in deferred:
+            heapq.heappush(self._waiters, entry)
+
+    def metrics(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "total_limit": self.total_limit,
+            "lanes": {
+                name: {
+                    "limit": lane.limit,
+                    "in_flight": lane.in_flight,
+                    "queue_depth": lane.queued,
+                    "max_queue": lane.max_queue,
+                    "admitted": lane.admitted,
+                    "shed": lane.shed,
+                }
+                for name, lane in self.lanes.items()
+            },
+        }
+
+
+admission_controller = AdmissionController()
+
+
+def _matches(method: str, route: str, pattern: str) -> bool:
+    """Match a route against an ADMISSION_HEAVY_PATHS entry such as ``/analytics`` or ``POST /jobs/$``."""
+    pattern_method, _, prefix = pattern.rpartition(" ")
+    if pattern_method and pattern_method != method:
+        return False
+    if prefix.endswith("$"):
+        return route.rstrip("/") == prefix[:-1].rstrip("/")
+    return route.startswith(prefix)
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Return the request's lane, or None for requests that bypass admission control."""
+    if not path.startswith(settings.API_V1_STR):
+        return None
+    route = path[len(settings.API_V1_STR):]
+    if any(route.startswith(prefix) for prefix in settings.ADMISSION_EXEMPT_PATHS):
+        return None
+    # Checked first so that heavy writes such as job submission are not admitted ahead of reads
+    if any(_matches(method, route, pattern) for pattern in settings.ADMISSION_HEAVY_PATHS):
+        return HEAVY
+    if method in WRITE_METHODS:
+        return WRITE
+    return READ
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying ``admission_controller`` to API requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+        lane_name = classify(scope["method"], scope["path"])
+        if lane_name is None:
+            return await self.app(scope, receive, send)
+
+        lane = admission_controller.lanes[lane_name]
+        if not await admission_controller.acquire(lane):
+            return await self._reject(send, lane)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_controller.release(lane)
+
+    @staticmethod
+    async def _reject(send, lane: Lane) -> None:
+        body = json.dumps({"detail": f"Server busy ({lane.name} capacity exhausted), retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Oil & Gas Production Analytics"
@@ -14,8 +14,80 @@ class Settings(BaseSettings):
     DATA_DIR: str = "data"
     SAMPLE_DATA_FILE: str = "sample_data.csv"
     
+    # Batch settings
+    DELETE_CHUNK_SIZE: int = 5000
+    
+    # Background job settings
+    JOB_THREAD_WORKERS: int = 2
+    JOB_PROCESS_WORKERS: int = 1
+    JOB_MAX_PENDING: int = 32
+    JOB_PROGRESS_INTERVAL: float = 1.0
+    JOB_RESULTS_DIR: str = "jobs"
+    JOB_HEARTBEAT_SECONDS: float = 10.0
+    JOB_STALE_SECONDS: float = 60.0
+    
+    # Archive settings
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_AFTER_DAYS: int = 730
+    ARCHIVE_CHUNK_SIZE: int = 50000
+    
+    # Shared snapshot settings
+    SNAPSHOT_DIR: str = "snapshot"
+    SNAPSHOT_READS: bool = False
+    SNAPSHOT_CHECK_INTERVAL: float = 5.0
+    SNAPSHOT_REBUILD_SECONDS: float = 60.0
+    
+    # Live production feed settings
+    STREAM_QUEUE_SIZE: int = 1000
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    STREAM_POLL_SECONDS: float = 0.5
+    
+    # Change log settings
+    CHANGELOG_RETENTION_DAYS: int = 30
+    CHANGELOG_COMPACT_SECONDS: float = 3600.0
+    
+    # Slow-query log settings
+    SLOW_QUERY_THRESHOLD_MS: float = 500.0
+    SLOW_QUERY_LOG_SIZE: int = 100
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_EXPLAIN_ANALYZE: bool = True
+    
+    # Admission control settings (paths are relative to API_V1_STR)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_TOTAL_CONCURRENCY: int = 15
+    ADMISSION_LIMITS: Dict[str, int] = {"read": 12, "heavy": 3, "write": 8}
+    ADMISSION_QUEUE_SIZES: Dict[str, int] = {"read": 100, "heavy": 10, "write": 200}
+    ADMISSION_MAX_WAIT_SECONDS: Dict[str, float] = {"read": 2.0, "heavy": 5.0, "write": 10.0}
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+    # Prefixes, optionally preceded by a method; a trailing "$" matches the path exactly
+    ADMISSION_HEAVY_PATHS: List[str] = [
+        "POST /jobs/$", "/changes", "/analytics", "/dashboard", "/production/cumulative",
+    ]
+    ADMISSION_EXEMPT_PATHS: List[str] = ["/production/stream", "/admin"]
+    
+    # Sketch settings (KLL accuracy parameter, HyperLogLog register bits, merge and stale-rebuild intervals)
+    SKETCH_KLL_K: int = 200
+    SKETCH_HLL_PRECISION: int = 12
+    SKETCH_MERGE_SECONDS: float = 10.0
+    SKETCH_REBUILD_SECONDS: float = 300.0
+    
+    # Dashboard bundle settings
+    DASHBOARD_WORKERS: int = 4
+    DASHBOARD_CACHE_SIZE: int = 128
+    DASHBOARD_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Drop-folder ingestion settings (INGEST_DIR is relative to DATA_DIR)
+    INGEST_DIR: str = "incoming"
+    INGEST_BATCH_ROWS: int = 5000
+    INGEST_POLL_SECONDS: float = 5.0
+    INGEST_HEAD_BYTES: int = 4096
+    
     # Server settings
     BACKEND_PORT: str = "8000"
+    # "full" creates tables and seeds on every worker start; "lazy" expects
+    # `python -m app.db.init_db` to have been run once before workers start
+    STARTUP_MODE: str = "full"
+    WARMUP_ON_STARTUP: bool = True
     
     # Database settings
     POSTGRES_SERVER: str 
@@ -26,6 +98,11 @@ class Settings(BaseSettings):
     
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
     
+    # Read replicas (SQLAlchemy URLs); GET endpoints are routed to them
+    READ_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_INTERVAL: float = 10.0
+    
     @property
     def get_database_url(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
@@ -40,4 +117,5 @@ def get_settings() -> Settings:
     return Settings()
 
 settings = get_settings()
-settings.SQLALCHEMY_DATABASE_URI = settings.get_database_url 
\ No newline at end of file
+if not settings.SQLALCHEMY_DATABASE_URI:
+    settings.SQLALCHEMY_DATABASE_URI = settings.get_database_url 
\ No newline at end of file
@@ -5,9 +5,6 @@ import os
 from loguru import logger
 from pydantic import BaseModel
 
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
-
 class LogConfig(BaseModel):
     """
     Logging configuration to be set for the application.
@@ -31,6 +28,9 @@ def setup_logging():
     """
     log_config = LogConfig()
     
+    # Create logs directory if it doesn't exist
+    os.makedirs(os.path.dirname(log_config.LOG_FILE_PATH), exist_ok=True)
+    
     # Configure loguru
     logger.remove()  # Remove default handler
     logger.add(sys.stderr, level=log_config.LOG_LEVEL, format=log_config.LOG_FORMAT)
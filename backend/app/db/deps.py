@@ -1,10 +1,49 @@
+import time
 from typing import Generator
+from fastapi import Request
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
+from app.db.replicas import replica_pool
+
+# Set on write requests so the same client reads from the primary until replicas catch up
+READ_PRIMARY_COOKIE = "read_primary_until"
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def wants_primary(request: Request) -> bool:
+    """
+    True when a read must observe the client's own recent writes.
+    """
+    if request.headers.get(READ_YOUR_WRITES_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Session for read-only endpoints, bound to a healthy read replica when one is configured.
+    """
+    pinned = wants_primary(request)
+    engine = None if pinned else replica_pool.engine()
+    db = SessionLocal(bind=engine) if engine is not None else SessionLocal()
+    db.info["read_only"] = engine is not None
+    # A pinned read must not share a query that began before the client's write
+    db.info["pinned"] = pinned
+    try:
+        yield db
+    finally:
+        db.close()
+
+@event.listens_for(Session, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    if session.info.get("read_only"):
+        raise RuntimeError("Attempted to write through a read-replica session")
@@ -1,13 +1,29 @@
 from sqlalchemy.orm import Session
 
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import SessionLocal, get_engine
 from app.db.seed import seed_database
+from app.services.cumulative import ensure_cumulative
+from app.models import job, change_log, sketch, ingest, cumulative  # noqa: F401 - register tables with Base.metadata
 
 def init_db(db: Session) -> None:
     """Initialize the database with tables and seed data."""
     # Create all tables
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
     # Seed the database with sample data
-    seed_database(db) 
\ No newline at end of file
+    seed_database(db)
+
+    # Databases upgraded from before the cumulative index get it built once
+    ensure_cumulative(db)
+
+def main() -> None:
+    """One-shot schema and seed step, run before starting workers in lazy startup mode."""
+    db = SessionLocal()
+    try:
+        init_db(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Statement timing and slow-query capture for every SQLAlchemy engine.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are logged and kept in a bounded
+ring buffer together with the endpoint that issued them, the shapes (not values)
+of their bound parameters and, for SELECTs, the query plan. Plans are captured on
+a background thread over a connection of their own, outside the engine's pool, so
+the slow request is not made slower still and never waits for a connection.
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.logging import logger
+
+current_endpoint: ContextVar[Optional[str]] = ContextVar("current_endpoint", default=None)
+
+_slow_queries: Deque[Dict[str, Any]] = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+_lock = Lock()
+_explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+_explained_at: Dict[str, float] = {}
+_explain_engines: Dict[URL, Engine] = {}
+
+
+def _collapse(shapes: List[str]) -> List[str]:
+    """Turn ["int", "int", "int", "str"] into ["int x3", "str"] so long IN lists stay readable."""
+    collapsed: List[List[Any]] = []
+    for shape in shapes:
+        if collapsed and collapsed[-1][0] == shape:
+            collapsed[-1][1] += 1
+        else:
+            collapsed.append([shape, 1])
+    return [shape if n == 1 else f"{shape} x{n}" for shape, n in collapsed]
+
+
+def parameter_shapes(parameters: Any, executemany: bool = False) -> Any:
+    if executemany:
+        rows = list(parameters)
+        return {"executemany": len(rows), "row": parameter_shapes(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return _collapse([type(value).__name__ for value in parameters])
+    return type(parameters).__name__
+
+
+def _explain_sql(dialect: str, statement: str) -> Optional[str]:
+    if dialect == "postgresql":
+        options = "ANALYZE, BUFFERS" if settings.SLOW_QUERY_EXPLAIN_ANALYZE else "COSTS"
+        return f"EXPLAIN ({options}) {statement}"
+    if dialect == "sqlite":
+        return f"EXPLAIN QUERY PLAN {statement}"
+    return None
+
+
+def _explain_engine(engine: Engine) -> Engine:
+    """Unpooled engine for the same database; only the explain thread uses it."""
+    if engine.url not in _explain_engines:
+        _explain_engines[engine.url] = create_engine(engine.url, poolclass=NullPool)
+    return _explain_engines[engine.url]
+
+
+def _capture_plan(engine: Engine, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+    sql = _explain_sql(engine.dialect.name, statement)
+    if sql is None:
+        return
+    connection = _explain_engine(engine).raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(sql, parameters)
+        entry["plan"] = "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+        cursor.close()
+        connection.rollback()
+        logger.warning(f"Plan for slow query ({entry['duration_ms']} ms):\n{entry['plan']}")
+    except Exception as e:
+        entry["plan_error"] = str(e)
+    finally:
+        connection.close()
+
+
+def _should_explain(statement: str) -> bool:
+    if not settings.SLOW_QUERY_EXPLAIN:
+        return False
+    # A WITH statement may be a data-modifying CTE, which EXPLAIN ANALYZE would run
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return False
+    # Explain each distinct statement at most once a minute
+    now = time.monotonic()
+    with _lock:
+        if now - _explained_at.get(statement, float("-inf")) < 60:
+            return False
+        _explained_at[statement] = now
+        if len(_explained_at) > 1000:
+            _explained_at.clear()
+    return True
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append((context, time.perf_counter()))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A statement that raised never reaches after_cursor_execute
+    pending = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if pending and pending[-1][0] is exception_context.execution_context:
+        pending.pop()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _, started = conn.info["query_start"].pop()
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+
+    entry = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "duration_ms": round(duration_ms, 1),
+        "endpoint": current_endpoint.get(),
+        "statement": statement,
+        "parameters": parameter_shapes(parameters, executemany),
+        "plan": None,
+    }
+    with _lock:
+        _slow_queries.append(entry)
+    logger.warning(f"Slow query ({entry['duration_ms']} ms) from {entry['endpoint']}: {statement}")
+
+    if not executemany and _should_explain(statement):
+        _explainer.submit(_capture_plan, conn.engine, entry, statement, parameters)
+
+
+def slow_queries() -> List[Dict[str, Any]]:
+    """Most recent slow queries first."""
+    with _lock:
+        return list(reversed(_slow_queries))
+
+
+def clear_slow_queries() -> None:
+    with _lock:
+        _slow_queries.clear()
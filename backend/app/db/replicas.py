@@ -0,0 +1,126 @@
+import time
+from dataclasses import dataclass
+from itertools import count
+from threading import Lock, Thread
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logging import logger
+
+# Seconds behind the primary; 0 on the primary itself and on non-PostgreSQL databases.
+# A replica that has replayed all the WAL it received is caught up: the age of its
+# last replayed transaction only says how long the primary has been idle.
+POSTGRES_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() IS NOT DISTINCT FROM pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+@dataclass
+class Replica:
+    url: str
+    engine: Engine
+    # Out of rotation until the first health check passes
+    healthy: bool = False
+    lag: float = 0.0
+    checked_at: float = 0.0
+    error: Optional[str] = None
+
+
+class ReplicaPool:
+    """
+    Round-robin routing over read replicas with health- and lag-based ejection.
+
+    A replica is ejected when a health check fails, its replication lag exceeds
+    REPLICA_MAX_LAG_SECONDS, or a statement on it fails with a connection error.
+    A background thread checks every replica each REPLICA_HEALTH_CHECK_INTERVAL
+    seconds, so request threads only read the last known state.
+    """
+
+    def __init__(self, urls: List[str]):
+        self._urls = urls
+        self._replicas: Optional[List[Replica]] = None
+        self._lock = Lock()
+        self._counter = count()
+
+    def _ensure(self) -> List[Replica]:
+        if self._replicas is None:
+            with self._lock:
+                if self._replicas is None:
+                    replicas = []
+                    for url in self._urls:
+                        replica = Replica(url=url, engine=create_engine(url, pool_pre_ping=True))
+                        event.listen(replica.engine, "handle_error", self._on_error(replica))
+                        replicas.append(replica)
+                    self._replicas = replicas
+                    if replicas:
+                        Thread(target=self._refresh_loop, name="replica-health", daemon=True).start()
+        return self._replicas
+
+    def _refresh_loop(self) -> None:
+        while True:
+            for replica in self._replicas:
+                self._check(replica)
+            time.sleep(settings.REPLICA_HEALTH_CHECK_INTERVAL)
+
+    def _on_error(self, replica: Replica):
+        def handle_error(context):
+            if context.is_disconnect:
+                self._eject(replica, str(context.original_exception))
+        return handle_error
+
+    def _eject(self, replica: Replica, reason: str) -> None:
+        if replica.healthy:
+            logger.warning(f"Ejecting read replica {replica.engine.url!r}: {reason}")
+        replica.healthy = False
+        replica.error = reason
+        replica.checked_at = time.monotonic()
+
+    def _check(self, replica: Replica) -> None:
+        try:
+            with replica.engine.connect() as connection:
+                if replica.engine.dialect.name == "postgresql":
+                    replica.lag = float(connection.execute(POSTGRES_LAG_SQL).scalar() or 0.0)
+                else:
+                    connection.execute(text("SELECT 1"))
+                    replica.lag = 0.0
+            if replica.lag > settings.REPLICA_MAX_LAG_SECONDS:
+                self._eject(replica, f"replication lag {replica.lag:.1f}s")
+            else:
+                if not replica.healthy:
+                    logger.info(f"Read replica {replica.engine.url!r} back in rotation")
+                replica.healthy = True
+                replica.error = None
+                replica.checked_at = time.monotonic()
+        except Exception as e:
+            self._eject(replica, str(e))
+
+    def engine(self) -> Optional[Engine]:
+        """Return a healthy replica engine, or None to fall back to the primary."""
+        replicas = self._ensure()
+        if not replicas:
+            return None
+        healthy = [replica for replica in replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)].engine
+
+    def status(self) -> List[Dict]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag,
+                "error": replica.error,
+            }
+            for replica in (self._replicas or [])
+        ]
+
+
+replica_pool = ReplicaPool(settings.READ_REPLICA_URLS)
@@ -8,6 +8,8 @@ from sqlalchemy.orm import Session
 from app.models.well import Well
 from app.models.production import ProductionData
 from app.core.config import settings
+from app.services.cumulative import rebuild_wells
+from app.services.sketches import record_samples
 
 def read_sample_data() -> List[dict]:
     """Read sample data from CSV file."""
@@ -38,6 +40,26 @@ def read_sample_data() -> List[dict]:
     
     return list(wells.values()), production_data
 
+def load_sample_data(db: Session) -> None:
+    """
+    Upsert the sample data into a populated database, in the caller's transaction.
+
+    Wells are matched by name and production rows by well and date, as in
+    drop-folder ingestion.
+    """
+    from app.services.archive import write_cutoff
+    from app.services.ingest import upsert_production, upsert_wells
+
+    wells_data, production_data = read_sample_data()
+    # Archived dates are read-only
+    cutoff = write_cutoff()
+    production_data = [row for row in production_data if cutoff is None or row["date"] >= cutoff]
+    wells = upsert_wells(db, [
+        {"well_name": well["name"], "latitude": well["latitude"], "longitude": well["longitude"], "region": well["region"]}
+        for well in wells_data
+    ])
+    upsert_production(db, production_data, wells)
+
 def seed_database(db: Session) -> None:
     """Seed the database with sample data."""
     # Check if data already exists
@@ -57,10 +79,15 @@ def seed_database(db: Session) -> None:
         wells[well.name] = well
     
     # Create production data
+    samples = []
     for prod_data in production_data:
         well_name = prod_data.pop('well_name')
         well = wells[well_name]
         production = ProductionData(well_id=well.id, **prod_data)
         db.add(production)
+        samples.append((well.region, production.date, well.id, production.oil_volume))
     
+    record_samples(db, samples)
+    db.flush()
+    rebuild_wells(db, [well.id for well in wells.values()])
     db.commit() 
\ No newline at end of file
@@ -1,13 +1,54 @@
+from threading import Lock
+from typing import Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db import instrumentation  # noqa: F401 - time statements on every engine
+
+_engine: Optional[Engine] = None
+_engine_lock = Lock()
+
+def get_engine() -> Engine:
+    """
+    Return the primary engine, creating it on first use.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+    return _engine
+
+def reset_engine_after_fork() -> None:
+    """
+    Drop pooled connections inherited from a parent process without closing them.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+class LazySessionMaker(sessionmaker):
+    """
+    sessionmaker that binds to the primary engine the first time a session is created.
+    """
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+SessionLocal = LazySessionMaker(autocommit=False, autoflush=False)
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def __getattr__(name: str):
+    # Keep `from app.db.session import engine` working without building it at import time
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -1,11 +1,24 @@
-from fastapi import FastAPI
+import time
+# Measured before the heavy imports so startup_seconds covers them
+_process_started = time.perf_counter()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
 import os
+import threading
 from app.core.config import settings
 from app.api.v1.router import api_router
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, get_engine
+from app.db.deps import READ_PRIMARY_COOKIE
+from app.db.replicas import replica_pool
+from app.db.instrumentation import current_endpoint
+from app.core.admission import AdmissionMiddleware
 from app.db.init_db import init_db
 from app.core.logging import setup_logging
+from app.services.jobs import job_runner
+from app.services.snapshot import snapshot_reader
 
 # Setup logging
 logger = setup_logging()
@@ -17,6 +30,9 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
 )
 
+# Limit concurrent API requests per route class (inside CORS so 503s carry CORS headers)
+app.add_middleware(AdmissionMiddleware)
+
 # Configure CORS
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -27,25 +43,93 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+@app.middleware("http")
+async def tag_endpoint(request: Request, call_next):
+    """
+    Record the endpoint handling the request so slow queries can be attributed to it.
+    """
+    token = current_endpoint.set(f"{request.method} {request.url.path}")
+    try:
+        return await call_next(request)
+    finally:
+        current_endpoint.reset(token)
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """
+    Pin a client's reads to the primary for REPLICA_MAX_LAG_SECONDS after it writes.
+    """
+    response = await call_next(request)
+    if (
+        settings.READ_REPLICA_URLS
+        and request.method in ("POST", "PUT", "PATCH", "DELETE")
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + settings.REPLICA_MAX_LAG_SECONDS),
+            max_age=int(settings.REPLICA_MAX_LAG_SECONDS) + 1,
+            httponly=True,
+        )
+    return response
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# Create data directory if it doesn't exist
-os.makedirs(settings.DATA_DIR, exist_ok=True)
+app.state.ready = False
+app.state.startup_seconds = None
+
+WARMUP_RETRY_SECONDS = 2.0
+
+def _warm_up():
+    """
+    Open the first pooled connection and map the shared snapshot, then mark the worker ready.
+
+    Retries until it succeeds; the worker stays unready meanwhile.
+    """
+    while True:
+        try:
+            if settings.WARMUP_ON_STARTUP:
+                with get_engine().connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                if settings.SNAPSHOT_READS:
+                    snapshot_reader.current()
+        except Exception as e:
+            logger.warning(f"Warm-up failed, retrying in {WARMUP_RETRY_SECONDS}s: {str(e)}")
+            time.sleep(WARMUP_RETRY_SECONDS)
+            continue
+        app.state.startup_seconds = round(time.perf_counter() - _process_started, 3)
+        app.state.ready = True
+        logger.info(f"Worker ready in {app.state.startup_seconds}s")
+        return
 
 # Initialize database and seed data
 @app.on_event("startup")
 def startup_event():
     """
-    Initialize the database on startup.
+    Initialize the database on startup (STARTUP_MODE=full) and warm up in the background.
     """
-    logger.info("Initializing database")
-    db = SessionLocal()
-    try:
-        init_db(db)
-    finally:
-        db.close()
-    logger.info("Database initialized successfully")
+    # Create data directory if it doesn't exist
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+
+    if settings.STARTUP_MODE == "full":
+        logger.info("Initializing database")
+        db = SessionLocal()
+        try:
+            init_db(db)
+        finally:
+            db.close()
+        logger.info("Database initialized successfully")
+
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    job_runner.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """
+    Stop background job workers and their heartbeat.
+    """
+    job_runner.shutdown()
 
 @app.get("/")
 async def root():
@@ -59,6 +143,32 @@ async def root():
         "api_docs": "/docs",
     }
 
+@app.get("/health/live")
+async def liveness():
+    """
+    Liveness probe - the process is up and serving requests.
+    """
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """
+    Readiness probe - warm-up has finished and the database is reachable.
+    """
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    try:
+        with get_engine().connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.warning(f"Readiness check failed: {str(e)}")
+        return JSONResponse(status_code=503, content={"status": "unavailable", "detail": "Database unavailable"})
+    return {
+        "status": "ready",
+        "startup_seconds": app.state.startup_seconds,
+        "replicas": replica_pool.status(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from app.db.base import Base
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=True)
+    op = Column(String, nullable=False)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, index=True)
+
+    __table_args__ = (Index("ix_change_log_entity", "entity", "entity_id"),)
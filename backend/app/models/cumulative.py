@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, UniqueConstraint
+from app.db.base import Base
+
+class ProductionCumulative(Base):
+    __tablename__ = "production_cumulative"
+
+    id = Column(Integer, primary_key=True, index=True)
+    well_id = Column(Integer, ForeignKey("wells.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    cum_oil = Column(Float, nullable=False, default=0.0)
+    cum_gas = Column(Float, nullable=False, default=0.0)
+    cum_water = Column(Float, nullable=False, default=0.0)
+
+    # Also the index behind the "latest entry on or before a date" lookups
+    __table_args__ = (UniqueConstraint("well_id", "date", name="uq_production_cumulative_well_date"),)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime
+from app.db.base import Base
+
+class IngestCheckpoint(Base):
+    __tablename__ = "ingest_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String, unique=True, nullable=False)
+    offset = Column(BigInteger, nullable=False, default=0)
+    head_hash = Column(String, nullable=True)
+    header = Column(String, nullable=True)
+    rows_ingested = Column(BigInteger, nullable=False, default=0)
+    rows_rejected = Column(BigInteger, nullable=False, default=0)
+    busy_seconds = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON, Text
+from app.db.base import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String, index=True)
+    status = Column(String, index=True, default="queued")
+    params = Column(JSON, default=dict)
+    progress = Column(Float, default=0.0)
+    message = Column(String, nullable=True)
+    result_path = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, default=False)
+    created_at = Column(DateTime)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -11,4 +11,7 @@ class ProductionData(Base):
     oil_volume = Column(Float)
     gas_volume = Column(Float)
     water_volume = Column(Float)
-    well = relationship("Well", back_populates="production_data") 
\ No newline at end of file
+    well = relationship("Well", back_populates="production_data")
+
+    # One row per well and day, matching production_cumulative
+    __table_args__ = (UniqueConstraint("well_id", "date", name="uq_production_data_well_date"),)
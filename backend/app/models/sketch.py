@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, LargeBinary, UniqueConstraint, Index
+from app.db.base import Base
+
+class ProductionSketch(Base):
+    __tablename__ = "production_sketches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    region = Column(String, nullable=False)
+    month = Column(Date, nullable=False)
+    oil_quantiles = Column(LargeBinary, nullable=False)
+    producing_wells = Column(LargeBinary, nullable=False)
+    stale = Column(Boolean, default=False)
+    updated_at = Column(DateTime)
+
+    __table_args__ = (UniqueConstraint("region", "month", name="uq_production_sketches_region_month"),)
+
+class ProductionSketchDelta(Base):
+    """Sketch of one write's new rows, pending merge into its region and month."""
+    __tablename__ = "production_sketch_deltas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    region = Column(String, nullable=False)
+    month = Column(Date, nullable=False)
+    oil_quantiles = Column(LargeBinary, nullable=False)
+    producing_wells = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime)
+
+    __table_args__ = (Index("ix_production_sketch_deltas_region_month", "region", "month"),)
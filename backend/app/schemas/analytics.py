@@ -0,0 +1,17 @@
+from typing import Dict, List, Optional
+from datetime import date
+from pydantic import BaseModel
+
+class ErrorBounds(BaseModel):
+    quantile_rank_error: float
+    distinct_count_relative_error: float
+
+class DistributionStats(BaseModel):
+    regions: List[str]
+    start_month: Optional[date] = None
+    end_month: Optional[date] = None
+    samples: int
+    quantiles: Dict[str, Optional[float]]
+    producing_wells: int
+    error_bounds: ErrorBounds
+    stale: bool
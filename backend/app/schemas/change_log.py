@@ -0,0 +1,19 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class Change(BaseModel):
+    version: int
+    entity: str
+    entity_id: Optional[int] = None
+    op: str
+    data: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChangeSet(BaseModel):
+    changes: List[Change]
+    version: int
+    has_more: bool
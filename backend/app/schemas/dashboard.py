@@ -0,0 +1,25 @@
+from typing import List, Optional
+from datetime import date
+from pydantic import BaseModel
+
+from app.schemas.production import ProductionDataResponse
+from app.schemas.well import Well
+
+class SeriesBucket(BaseModel):
+    date: date
+    oil_volume: float
+    gas_volume: float
+    water_volume: float
+
+class RegionTotal(BaseModel):
+    region: Optional[str] = None
+    oil_volume: float
+    gas_volume: float
+    water_volume: float
+
+class DashboardBundle(BaseModel):
+    version: int
+    wells: List[Well]
+    series: List[SeriesBucket]
+    regions: List[RegionTotal]
+    page: List[ProductionDataResponse]
@@ -0,0 +1,23 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class JobCreate(BaseModel):
+    job_type: str
+    params: Dict[str, Any] = {}
+
+class Job(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    params: Dict[str, Any] = {}
+    progress: float = 0.0
+    message: Optional[str] = None
+    result_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,7 @@
-from typing import Optional
+import datetime
+from typing import List, Optional
 from datetime import date
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class ProductionDataBase(BaseModel):
     well_id: int
@@ -14,7 +15,8 @@ class ProductionDataCreate(ProductionDataBase):
 
 class ProductionDataUpdate(ProductionDataBase):
     well_id: Optional[int] = None
-    date: Optional[date] = None
+    # Qualified: in this class body a bare ``date`` would name the field's own default
+    date: Optional[datetime.date] = None
 
 class ProductionDataResponse(BaseModel):
     well_name: str
@@ -24,3 +26,32 @@ class ProductionDataResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class ProductionVolumeUpdate(BaseModel):
+    well_id: int
+    date: date
+    oil_volume: Optional[float] = None
+    gas_volume: Optional[float] = None
+    water_volume: Optional[float] = None
+
+class ProductionBatchUpdate(BaseModel):
+    items: List[ProductionVolumeUpdate] = Field(..., min_length=1)
+
+class ProductionBatchResult(BaseModel):
+    rows_affected: int
+
+class WellCumulativeProduction(BaseModel):
+    well_id: int
+    well_name: str
+    region: Optional[str] = None
+    oil_volume: float
+    gas_volume: float
+    water_volume: float
+
+class CumulativeProduction(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    oil_volume: float
+    gas_volume: float
+    water_volume: float
+    wells: List[WellCumulativeProduction]
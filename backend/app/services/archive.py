@@ -0,0 +1,451 @@
+import json
+import operator
+import os
+import uuid
+from datetime import date, timedelta
+from functools import reduce
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import delete, select, true
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.services.jobs import JobContext, register_job
+
+ARCHIVE_COLUMNS = ["id", "well_id", "date", "oil_volume", "gas_volume", "water_volume"]
+FILE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("well_id", pa.int64()),
+    ("date", pa.date32()),
+    ("oil_volume", pa.float64()),
+    ("gas_volume", pa.float64()),
+    ("water_volume", pa.float64()),
+])
+# Directory names are URI-encoded: region=<quoted>/year=YYYY/month=MM
+PARTITION_SCHEMA = pa.schema([("region", pa.string()), ("year", pa.int32()), ("month", pa.int32())])
+MANIFEST_FILE = "_manifest.json"
+JOURNAL_FILE = "_pending.json"
+
+
+class ArchivedDateError(ValueError):
+    """Raised when a write targets a date that has been moved to the archive."""
+
+
+def archive_root() -> Path:
+    return Path(settings.DATA_DIR) / settings.ARCHIVE_DIR
+
+
+def _read_cutoff(name: str) -> Optional[date]:
+    path = archive_root() / name
+    if not path.exists():
+        return None
+    with open(path) as f:
+        cutoff = json.load(f).get("cutoff")
+    return date.fromisoformat(cutoff) if cutoff else None
+
+
+def archive_cutoff() -> Optional[date]:
+    """
+    Return the archive watermark: archive reads return rows dated before it, database
+    reads merged with them only rows from it on.
+    """
+    return _read_cutoff(MANIFEST_FILE)
+
+
+def not_archived():
+    """Condition on ProductionData leaving out rows the archive serves."""
+    cutoff = archive_cutoff()
+    return ProductionData.date >= cutoff if cutoff else true()
+
+
+def write_cutoff() -> Optional[date]:
+    """Return the first writable date: the archive cutoff, or the one a running archive moves it to."""
+    return max(filter(None, (archive_cutoff(), _read_cutoff(JOURNAL_FILE))), default=None)
+
+
+def ensure_writable(*days: Optional[date]) -> None:
+    """Raise ArchivedDateError if any of the dates is before the write cutoff."""
+    cutoff = write_cutoff()
+    archived = sorted(day for day in days if day is not None and cutoff is not None and day < cutoff)
+    if archived:
+        raise ArchivedDateError(
+            f"Production before {cutoff.isoformat()} is archived and read-only (got {archived[0].isoformat()})"
+        )
+
+
+def _write_json_atomic(path: Path, payload: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _partition_dir(region: Optional[str], year: int, month: int) -> Path:
+    return (
+        archive_root()
+        / f"region={quote(region or '', safe='')}"
+        / f"year={year:04d}"
+        / f"month={month:02d}"
+    )
+
+
+def _delete_archived(db: Session, files: List[str]) -> None:
+    """Delete the hot rows written to ``files``, committing per file."""
+    for path in files:
+        if not os.path.exists(path):
+            continue
+        ids = pd.read_parquet(path, columns=["id"])["id"].tolist()
+        for start in range(0, len(ids), 10000):
+            db.execute(
+                delete(ProductionData)
+                .where(ProductionData.id.in_(ids[start:start + 10000]))
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+
+
+def _recover_pending(db: Session) -> None:
+    """Finish or undo a run interrupted after it started writing files."""
+    journal = archive_root() / JOURNAL_FILE
+    if not journal.exists():
+        return
+    with open(journal) as f:
+        pending = json.load(f)
+    published = archive_cutoff()
+    # Journals without a cutoff were written after publishing it
+    if "cutoff" not in pending or (published is not None and published >= date.fromisoformat(pending["cutoff"])):
+        # Readers already take these rows from the archive
+        _delete_archived(db, pending["files"])
+        logger.info(f"Finished interrupted archive run ({len(pending['files'])} files)")
+    else:
+        # Never published, so never read; a later cutoff would expose them next to the hot rows
+        for path in pending["files"]:
+            if os.path.exists(path):
+                os.unlink(path)
+        logger.info(f"Discarded unpublished archive files ({len(pending['files'])} files)")
+    journal.unlink()
+
+
+def archive_production(
+    db: Session,
+    cutoff: Optional[date] = None,
+    ctx: Optional[JobContext] = None,
+) -> int:
+    """
+    Move production rows dated before ``cutoff`` from the database to Parquet.
+
+    Rows are written per region and month under ``DATA_DIR/ARCHIVE_DIR``, one chunk
+    of ``ARCHIVE_CHUNK_SIZE`` rows at a time. Archive reads only return rows before
+    the published cutoff, so the files stay unread until the new cutoff is published
+    in one atomic replace; from then on database reads merged with the archive skip
+    the rows below it, which are then deleted. Each row is served exactly once
+    throughout. Writes below the new cutoff are rejected from the start of the run.
+    Returns the number of rows archived.
+    """
+    cutoff = cutoff or date.today() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    root = archive_root()
+    root.mkdir(parents=True, exist_ok=True)
+    _recover_pending(db)
+    previous = archive_cutoff()
+    if previous is not None and cutoff <= previous:
+        cutoff = previous
+
+    files: List[str] = []
+    _write_json_atomic(root / JOURNAL_FILE, {"cutoff": cutoff.isoformat(), "files": files})
+    total = (
+        db.query(ProductionData)
+        .join(Well, ProductionData.well_id == Well.id)
+        .filter(ProductionData.date < cutoff)
+        .count()
+    )
+    archived = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(
+                ProductionData.id,
+                ProductionData.well_id,
+                ProductionData.date,
+                ProductionData.oil_volume,
+                ProductionData.gas_volume,
+                ProductionData.water_volume,
+                Well.region,
+            )
+            .join(Well, ProductionData.well_id == Well.id)
+            .where(ProductionData.date < cutoff, ProductionData.id > last_id)
+            .order_by(ProductionData.id)
+            .limit(settings.ARCHIVE_CHUNK_SIZE)
+        )
+        chunk = pd.DataFrame(db.execute(stmt).all(), columns=ARCHIVE_COLUMNS + ["region"])
+        if chunk.empty:
+            break
+
+        last_id = int(chunk["id"].max())
+        chunk["date"] = pd.to_datetime(chunk["date"]).dt.date
+        months = pd.to_datetime(chunk["date"])
+        for (region, year, month), part in chunk.groupby(
+            [chunk["region"].fillna(""), months.dt.year, months.dt.month]
+        ):
+            directory = _partition_dir(region, int(year), int(month))
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{uuid.uuid4().hex}.parquet"
+            pq.write_table(pa.Table.from_pandas(part[ARCHIVE_COLUMNS], schema=FILE_SCHEMA, preserve_index=False), path)
+            files.append(str(path))
+
+        _write_json_atomic(root / JOURNAL_FILE, {"cutoff": cutoff.isoformat(), "files": files})
+
+        archived += len(chunk)
+        logger.info(f"Wrote {archived}/{total} production rows older than {cutoff} to the archive")
+        if ctx is not None:
+            ctx.progress(archived / max(total, 1), f"{archived} rows archived")
+
+    if previous is None or cutoff > previous:
+        _write_json_atomic(root / MANIFEST_FILE, {"cutoff": cutoff.isoformat()})
+    # Exactly the exported rows: rows of missing wells were not selected and stay put
+    _delete_archived(db, files)
+    (root / JOURNAL_FILE).unlink()
+    return archived
+
+
+def _may_hold_well(path: Path, well_id: int) -> bool:
+    # Row group statistics rule most files out without reading any rows
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.schema.names.index("well_id")
+    for index in range(metadata.num_row_groups):
+        stats = metadata.row_group(index).column(column).statistics
+        if stats is None or not stats.has_min_max or stats.min <= well_id <= stats.max:
+            return True
+    return False
+
+
+def prune_well(well_id: int) -> int:
+    """
+    Remove a well's rows from the archive files; returns the number of rows removed.
+
+    Each affected file is rewritten without the well's rows and atomically replaces
+    the original (or is deleted when nothing is left), so concurrent scans see the
+    file either before or after the prune.
+    """
+    removed = 0
+    for path in archive_root().glob("region=*/year=*/month=*/part-*.parquet"):
+        if not _may_hold_well(path, well_id):
+            continue
+        table = pq.read_table(path, schema=FILE_SCHEMA)
+        keep = pc.not_equal(table["well_id"], well_id)
+        kept = table.filter(keep)
+        if kept.num_rows == table.num_rows:
+            continue
+        removed += table.num_rows - kept.num_rows
+        if kept.num_rows:
+            # Dataset scans skip files starting with an underscore
+            tmp = path.with_name(f"_{path.name}")
+            pq.write_table(kept, tmp)
+            os.replace(tmp, path)
+        else:
+            path.unlink()
+    if removed:
+        logger.info(f"Pruned {removed} archived production rows of well {well_id}")
+    return removed
+
+
+def _month_in_range(year: int, month: int, start_date: Optional[date], end_date: Optional[date]) -> bool:
+    first = date(year, month, 1)
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    if start_date and last < start_date:
+        return False
+    if end_date and first > end_date:
+        return False
+    return True
+
+
+def _partition_value(path: Path) -> str:
+    return unquote(path.name.split("=", 1)[1])
+
+
+def archived_months() -> List[date]:
+    """Return the first day of every month with archived rows, in any region."""
+    months = {
+        date(int(_partition_value(month_dir.parent)), int(_partition_value(month_dir)), 1)
+        for month_dir in archive_root().glob("region=*/year=*/month=*")
+    }
+    return sorted(months)
+
+
+def _dataset() -> ds.Dataset:
+    return ds.dataset(
+        str(archive_root()),
+        schema=pa.unify_schemas([FILE_SCHEMA, PARTITION_SCHEMA]),
+        format="parquet",
+        partitioning=ds.HivePartitioning(PARTITION_SCHEMA, segment_encoding="uri"),
+    )
+
+
+def _month_key(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def _scan_filter(
+    cutoff: date,
+    well_ids: Optional[Sequence[int]],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> ds.Expression:
+    # Files written for a cutoff not yet published hold later rows, still served by the database
+    conditions = [ds.field("date") < cutoff]
+    # The year/month conditions only involve partition fields, so pyarrow drops
+    # non-matching directories before opening any file
+    month = ds.field("year") * 12 + ds.field("month") - 1
+    if well_ids is not None:
+        conditions.append(ds.field("well_id").isin(list(well_ids)))
+    if start_date:
+        conditions += [month >= _month_key(start_date), ds.field("date") >= start_date]
+    if end_date:
+        conditions += [month <= _month_key(end_date), ds.field("date") <= end_date]
+    return reduce(operator.and_, conditions)
+
+
+def _month_filter(expression: ds.Expression, month: date) -> ds.Expression:
+    return expression & (ds.field("year") == month.year) & (ds.field("month") == month.month)
+
+
+def _sorted(table: pa.Table) -> pa.Table:
+    # The database's order: by date, then row id
+    return table.sort_by([("date", "ascending"), ("id", "ascending")])
+
+
+def scan_archive(
+    well_ids: Optional[Sequence[int]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Read archived production rows ordered by date and row id.
+
+    Filters are pushed into a pyarrow dataset scan: month partitions outside the
+    date range are skipped without being opened, and only ``columns`` (plus the
+    filter columns) are read. With ``limit``, months are visited in order and
+    months wholly before ``offset`` are only counted, not read.
+
+    The region directory records a well's region when it was archived; callers
+    filter by the wells' current region through ``well_ids``.
+    """
+    columns = columns or ARCHIVE_COLUMNS
+    read_columns = list(dict.fromkeys(columns + ["id", "well_id", "date"]))
+    empty = pd.DataFrame(columns=columns)
+
+    cutoff = archive_cutoff()
+    if cutoff is None or (start_date and start_date >= cutoff) or (well_ids is not None and not len(well_ids)):
+        return empty
+    if limit is not None and limit <= 0:
+        return empty
+
+    dataset = _dataset()
+    expression = _scan_filter(cutoff, well_ids, start_date, end_date)
+    if limit is None:
+        tables = [_sorted(dataset.to_table(columns=read_columns, filter=expression)).slice(offset)]
+    else:
+        tables = []
+        for month in archived_months():
+            if not _month_in_range(month.year, month.month, start_date, end_date):
+                continue
+            month_expression = _month_filter(expression, month)
+            if offset:
+                count = dataset.count_rows(filter=month_expression)
+                if count <= offset:
+                    offset -= count
+                    continue
+            table = _sorted(dataset.to_table(columns=read_columns, filter=month_expression)).slice(offset, limit)
+            offset = 0
+            tables.append(table)
+            limit -= table.num_rows
+            if limit == 0:
+                break
+
+    tables = [table for table in tables if table.num_rows]
+    if not tables:
+        return empty
+    frame = pa.concat_tables(tables).to_pandas(date_as_object=True)
+    return frame[columns].reset_index(drop=True)
+
+
+def count_archived(
+    well_ids: Optional[Sequence[int]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> int:
+    """Count archived rows matching the filters without reading them."""
+    cutoff = archive_cutoff()
+    if cutoff is None or (start_date and start_date >= cutoff) or (well_ids is not None and not len(well_ids)):
+        return 0
+    return _dataset().count_rows(filter=_scan_filter(cutoff, well_ids, start_date, end_date))
+
+
+def read_archived_production(
+    db: Session,
+    region: Optional[str] = None,
+    well_name: Optional[str] = None,
+    well_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Return archived rows matching the production filters, with well name and region.
+
+    Filters apply to the wells' current name and region. Rows are ordered by date
+    and row id; ``offset`` and ``limit`` page through them.
+    """
+    if archive_cutoff() is None:
+        return []
+
+    query = db.query(Well.id, Well.name, Well.region)
+    if region:
+        query = query.filter(Well.region == region)
+    if well_name:
+        query = query.filter(Well.name == well_name)
+    if well_id is not None:
+        query = query.filter(Well.id == well_id)
+    # Rows of deleted wells are left out
+    wells = {row.id: (row.name, row.region) for row in query.all()}
+    if not wells:
+        return []
+
+    columns = columns or ["well_id", "date", "oil_volume"]
+    frame = scan_archive(
+        list(wells), start_date, end_date, list(dict.fromkeys(["well_id"] + columns)), offset, limit
+    )
+    if frame.empty:
+        return []
+
+    frame = frame.astype(object).where(frame.notna(), None)
+    rows = []
+    for record in frame.to_dict("records"):
+        record["well_name"], record["region"] = wells[record["well_id"]]
+        rows.append(record)
+    return rows
+
+
+@register_job("archive_production")
+def archive_production_job(ctx: JobContext, cutoff: Optional[str] = None) -> None:
+    """Archive production rows older than ``cutoff`` (default ARCHIVE_AFTER_DAYS ago)."""
+    db = SessionLocal()
+    try:
+        archive_production(db, date.fromisoformat(cutoff) if cutoff else None, ctx)
+    finally:
+        db.close()
@@ -0,0 +1,256 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models.change_log import ChangeLog
+from app.models.well import Well
+from app.services.changelog import DELETE, DELETE_RANGE, INSERT, UPDATE
+from app.services.production_service import production_totals
+
+TAIL_BATCH_SIZE = 1000
+
+WellCache = Dict[int, Tuple[str, Optional[str]]]
+
+
+@dataclass(eq=False)
+class Subscription:
+    """A client's production filters plus its outgoing event queue."""
+
+    region: Optional[str] = None
+    well_name: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    # Change-log version delivered up to; starts at the one the initial aggregates were read after
+    since: int = 0
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=settings.STREAM_QUEUE_SIZE))
+
+    @property
+    def filters(self) -> Tuple[Optional[str], Optional[str], Optional[date], Optional[date]]:
+        return self.region, self.well_name, self.start_date, self.end_date
+
+    def _in_range(self, start: Optional[date], end: Optional[date]) -> bool:
+        if self.start_date and end and end < self.start_date:
+            return False
+        if self.end_date and start and start > self.end_date:
+            return False
+        return True
+
+    def _matches_well(self, well_name: str, region: Optional[str]) -> bool:
+        if self.region is not None and region != self.region:
+            return False
+        if self.well_name is not None and well_name != self.well_name:
+            return False
+        return True
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if event["type"] == "resync":
+            return self._in_range(event.get("start_date"), event.get("end_date")) and any(
+                self._matches_well(well["well_name"], well["region"]) for well in event["wells"]
+            )
+        row = event["row"]
+        return self._matches_well(row["well_name"], row["region"]) and self._in_range(row["date"], row["date"])
+
+
+def resync_event(
+    wells: List[Dict[str, Any]],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Build a ``resync`` event for set-based changes whose individual rows are not known."""
+    return {"type": "resync", "wells": wells, "start_date": start_date, "end_date": end_date}
+
+
+def _well(db: Session, wells: WellCache, well_id: int) -> Optional[Tuple[str, Optional[str]]]:
+    if well_id not in wells:
+        row = db.execute(select(Well.name, Well.region).where(Well.id == well_id)).first()
+        if row is None:
+            return None
+        wells[well_id] = (row.name, row.region)
+    return wells[well_id]
+
+
+def _row_event(db: Session, wells: WellCache, event_type: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    well = _well(db, wells, data["well_id"])
+    if well is None:
+        # The well is gone; its deletion entry resyncs the client
+        return []
+    return [{
+        "type": event_type,
+        "row": {
+            "well_name": well[0],
+            "region": well[1],
+            "date": date.fromisoformat(data["date"]),
+            "oil_volume": data.get("oil_volume"),
+            "gas_volume": data.get("gas_volume"),
+            "water_volume": data.get("water_volume"),
+        },
+    }]
+
+
+def entry_events(db: Session, entry: ChangeLog, wells: WellCache) -> List[Dict[str, Any]]:
+    """
+    Translate a change-log entry into stream events, keeping ``wells`` (id -> name, region) current.
+
+    Production inserts and updates become ``upsert``; an update that moved the row to
+    another well or date also deletes its ``previous`` key. Range deletes and well
+    renames, region changes and deletions become ``resync`` for the affected wells.
+    """
+    data = entry.data or {}
+    if entry.entity == "production":
+        if entry.op in (INSERT, UPDATE):
+            events = []
+            if data.get("previous"):
+                events += _row_event(db, wells, "delete", data["previous"])
+            return events + _row_event(db, wells, "upsert", data)
+        if entry.op == DELETE and data:
+            return _row_event(db, wells, "delete", data)
+        if entry.op == DELETE_RANGE:
+            well = _well(db, wells, data["well_id"])
+            if well is None:
+                return []
+            return [resync_event(
+                [{"well_name": well[0], "region": well[1]}],
+                date.fromisoformat(data["start_date"]) if data.get("start_date") else None,
+                date.fromisoformat(data["end_date"]) if data.get("end_date") else None,
+            )]
+        return []
+
+    if entry.entity == "well" and entry.entity_id is not None:
+        if entry.op == DELETE:
+            previous = wells.pop(entry.entity_id, None) or _well(db, wells, entry.entity_id)
+            return [resync_event([{"well_name": previous[0], "region": previous[1]}])] if previous else []
+        wells[entry.entity_id] = (data["name"], data.get("region"))
+        if entry.op == UPDATE and data.get("previous"):
+            # The well's rows leave the old name or region and join the new one
+            return [resync_event([
+                {"well_name": data["previous"]["name"], "region": data["previous"].get("region")},
+                {"well_name": data["name"], "region": data.get("region")},
+            ])]
+    return []
+
+
+class Broadcaster:
+    """
+    Fan out production changes to live subscriptions by tailing the change log.
+
+    While a process has subscribers, one thread polls ``change_log`` by version
+    every STREAM_POLL_SECONDS, so each API worker streams every committed write,
+    whichever process made it (other workers, jobs or the ingest daemon). Entries
+    become row events matched against each subscription; subscriptions that
+    matched get ``aggregates`` recomputed from the database, once per distinct
+    filter set and poll.
+
+    Each subscription's ``since`` is its own cursor. A poll reads from the lowest
+    one, so a client whose snapshot predates the tailer's position is replayed the
+    entries in between, and every other client only gets what is new to it.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscriptions: Set[Subscription] = set()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, subscription: Subscription) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._loop = loop
+            self._subscriptions.add(subscription)
+            if self._thread is None:
+                self._thread = Thread(target=self._tail, args=(subscription.since,), name="change-feed", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _tail(self, version: int) -> None:
+        wells: WellCache = {}
+        while True:
+            try:
+                version = self.poll(version, wells)
+            except Exception as e:
+                logger.warning(f"Live feed poll failed: {str(e)}")
+            with self._lock:
+                # The next subscriber starts a new tailer
+                if not self._subscriptions:
+                    self._thread = None
+                    return
+            time.sleep(settings.STREAM_POLL_SECONDS)
+
+    def poll(self, version: int, wells: WellCache) -> int:
+        """
+        Deliver the change-log entries after ``version``, or after an earlier subscription's
+        ``since``, to the subscriptions they are new to; returns the new position.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        start = min([version] + [subscription.since for subscription in subscriptions])
+        db = SessionLocal()
+        try:
+            if not wells:
+                wells.update((row.id, (row.name, row.region)) for row in db.execute(
+                    select(Well.id, Well.name, Well.region)
+                ))
+            entries = db.scalars(
+                select(ChangeLog)
+                .where(ChangeLog.version > start)
+                .order_by(ChangeLog.version)
+                .limit(TAIL_BATCH_SIZE)
+            ).all()
+            if not entries:
+                return version
+            events = [(entry.version, event) for entry in entries for event in entry_events(db, entry, wells)]
+
+            deliveries: List[Tuple[Subscription, Dict[str, Any]]] = []
+            matched: Dict[Tuple, List[Subscription]] = {}
+            for subscription in subscriptions:
+                hits = [
+                    event for entry_version, event in events
+                    if entry_version > subscription.since and subscription.matches(event)
+                ]
+                if hits:
+                    deliveries.extend((subscription, event) for event in hits)
+                    matched.setdefault(subscription.filters, []).append(subscription)
+            for filters, group in matched.items():
+                totals = {"type": "aggregates", "totals": production_totals(db, *filters)}
+                deliveries.extend((subscription, totals) for subscription in group)
+
+            for subscription in subscriptions:
+                subscription.since = max(subscription.since, entries[-1].version)
+
+            loop = self._loop
+            if deliveries and loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self._enqueue, deliveries)
+            return max(version, entries[-1].version)
+        finally:
+            db.close()
+
+    def _enqueue(self, deliveries: List[Tuple[Subscription, Dict[str, Any]]]) -> None:
+        for subscription, event in deliveries:
+            if subscription not in self._subscriptions:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A slow client gets a resync instead of an unbounded backlog
+                logger.warning("Live feed subscriber is too slow, requesting resync")
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait({"type": "resync", "wells": [], "reason": "overflow"})
+
+
+broadcaster = Broadcaster()
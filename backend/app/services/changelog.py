@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, event, exists, func, insert, or_, select
+from sqlalchemy.orm import Session, SessionTransaction, aliased
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models.change_log import ChangeLog
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.services.jobs import JobContext, register_job, schedule_job
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+DELETE_RANGE = "delete_range"
+
+# pg_advisory_xact_lock key held from version allocation until commit
+VERSION_LOCK_KEY = 0x63686C67
+
+
+def well_payload(well: Well) -> Dict[str, Any]:
+    return {
+        "name": well.name,
+        "latitude": well.latitude,
+        "longitude": well.longitude,
+        "region": well.region,
+    }
+
+
+def production_payload(production: ProductionData) -> Dict[str, Any]:
+    return {
+        "well_id": production.well_id,
+        "date": production.date.isoformat(),
+        "oil_volume": production.oil_volume,
+        "gas_volume": production.gas_volume,
+        "water_volume": production.water_volume,
+    }
+
+
+def record_change(
+    db: Session,
+    entity: str,
+    op: str,
+    entity_id: Optional[int] = None,
+    data: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Add a change-log entry to the current transaction; it commits with the write it describes.
+
+    Inserts and updates carry the full row so compaction can keep only the latest entry per row.
+    Entries are buffered on the session and only get their versions at commit.
+    """
+    db.info.setdefault("changes", []).append(
+        {"entity": entity, "entity_id": entity_id, "op": op, "data": data, "created_at": datetime.utcnow()}
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _write_changes(session: Session) -> None:
+    """
+    Insert the buffered entries as the last statement before the commit.
+
+    On PostgreSQL the versions are taken under a transaction-level advisory lock,
+    which is held until the commit, so versions become visible in increasing
+    order and a reader tailing by version never skips a late commit. SQLite
+    serializes writing transactions already.
+    """
+    if session.in_nested_transaction() or not session.info.get("changes"):
+        return
+    session.flush()
+    changes = session.info.pop("changes")
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(select(func.pg_advisory_xact_lock(VERSION_LOCK_KEY)))
+    session.execute(insert(ChangeLog), changes)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_changes(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("changes", None)
+
+
+def latest_version(db: Session) -> int:
+    """Highest change-log version visible to the session, 0 if the log is empty."""
+    return int(db.scalar(select(func.coalesce(func.max(ChangeLog.version), 0))))
+
+
+def read_changes(db: Session, since: int, limit: int) -> Tuple[List[ChangeLog], int, bool]:
+    """
+    Return changes after ``since``, the new high-water mark and whether more are pending.
+
+    Versions are allocated in commit order, so no entry can appear below a version
+    a client has already read.
+    """
+    rows = (
+        db.query(ChangeLog)
+        .filter(ChangeLog.version > since)
+        .order_by(ChangeLog.version)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, rows[-1].version if rows else since, has_more
+
+
+def _range_superseded(current, newer):
+    """
+    A newer entry deletes everything ``current``, a production ``delete_range``, deleted:
+    the deletion of its well, or a range of the same well covering its dates.
+    """
+    well_id = current.data["well_id"].as_integer()
+    start, end = current.data["start_date"].as_string(), current.data["end_date"].as_string()
+    newer_start, newer_end = newer.data["start_date"].as_string(), newer.data["end_date"].as_string()
+    return or_(
+        and_(newer.entity == "well", newer.op == DELETE, newer.entity_id == well_id),
+        and_(
+            newer.entity == "production",
+            newer.op == DELETE_RANGE,
+            newer.data["well_id"].as_integer() == well_id,
+            or_(newer_start.is_(None), and_(start.is_not(None), newer_start <= start)),
+            or_(newer_end.is_(None), and_(end.is_not(None), newer_end >= end)),
+        ),
+    )
+
+
+def compact_changes(db: Session, retention_days: Optional[int] = None) -> int:
+    """
+    Drop entries older than the retention window that a newer entry supersedes.
+
+    Row entries are superseded by a newer entry for the same row, range deletes by
+    the deletion of their well or a newer range of the well covering theirs. A
+    client replaying from any version still reaches the same final state, because
+    the surviving entries carry each row's latest full data or its deletion.
+    """
+    retention_days = settings.CHANGELOG_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    current, newer = aliased(ChangeLog), aliased(ChangeLog)
+    superseded = (
+        select(current.version)
+        .where(
+            current.created_at < cutoff,
+            exists().where(
+                newer.version > current.version,
+                or_(
+                    and_(
+                        current.entity_id.is_not(None),
+                        newer.entity == current.entity,
+                        newer.entity_id == current.entity_id,
+                    ),
+                    and_(current.op == DELETE_RANGE, _range_superseded(current, newer)),
+                ),
+            ),
+        )
+        .scalar_subquery()
+    )
+    removed = db.execute(
+        delete(ChangeLog).where(ChangeLog.version.in_(superseded)).execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    logger.info(f"Compacted {removed} change-log entries older than {cutoff}")
+    return removed
+
+
+@register_job("compact_changes")
+def compact_changes_job(ctx: JobContext, retention_days: Optional[int] = None) -> None:
+    """Compact superseded change-log entries."""
+    db = SessionLocal()
+    try:
+        compact_changes(db, retention_days)
+    finally:
+        db.close()
+
+
+def changes_to_compact(db: Session) -> bool:
+    cutoff = datetime.utcnow() - timedelta(days=settings.CHANGELOG_RETENTION_DAYS)
+    return db.query(ChangeLog.version).filter(ChangeLog.created_at < cutoff).first() is not None
+
+
+schedule_job("compact_changes", settings.CHANGELOG_COMPACT_SECONDS, when=changes_to_compact)
@@ -0,0 +1,321 @@
+"""
+Per-well cumulative production: running totals of oil, gas and water by date.
+
+``production_cumulative`` holds one row per well and production date whose
+``cum_*`` columns are the sums of that well's volumes up to and including the
+date, archived history included. The total over any date range is then the
+difference of two entries (the last on or before the end date and the last
+before the start date), found with two index lookups per well however long the
+history is.
+
+Writes adjust the index incrementally: an insert or delete on day d adds or
+subtracts its volumes from every later entry, an update applies its delta from d
+onwards. Ingested rows that extend a well's history are appended in bulk as
+running sums from its last entry. Range deletes rebuild the affected well's
+entries instead. Archiving moves rows out of ``production_data`` without
+touching this table.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models.cumulative import ProductionCumulative
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.services.archive import archive_cutoff, not_archived, scan_archive
+from app.services.jobs import JobContext, register_job
+
+VOLUMES = ["oil_volume", "gas_volume", "water_volume"]
+REBUILD_CHUNK_WELLS = 100
+
+
+def _volumes(oil: Optional[float], gas: Optional[float], water: Optional[float]) -> Tuple[float, float, float]:
+    return oil or 0.0, gas or 0.0, water or 0.0
+
+
+def _shift(db: Session, well_id: int, day: date, inclusive: bool, oil: float, gas: float, water: float) -> None:
+    """Add volumes to the well's entries after ``day`` (from ``day`` when inclusive)."""
+    if not (oil or gas or water):
+        return
+    stmt = (
+        update(ProductionCumulative)
+        .where(
+            ProductionCumulative.well_id == well_id,
+            ProductionCumulative.date >= day if inclusive else ProductionCumulative.date > day,
+        )
+        .values(
+            cum_oil=ProductionCumulative.cum_oil + oil,
+            cum_gas=ProductionCumulative.cum_gas + gas,
+            cum_water=ProductionCumulative.cum_water + water,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(stmt)
+
+
+def record_insert(
+    db: Session, well_id: int, day: date,
+    oil: Optional[float], gas: Optional[float], water: Optional[float],
+) -> None:
+    """Add a new production row to the index; runs in the caller's transaction."""
+    oil, gas, water = _volumes(oil, gas, water)
+    previous = db.execute(
+        select(ProductionCumulative.cum_oil, ProductionCumulative.cum_gas, ProductionCumulative.cum_water)
+        .where(ProductionCumulative.well_id == well_id, ProductionCumulative.date < day)
+        .order_by(ProductionCumulative.date.desc())
+        .limit(1)
+    ).first() or (0.0, 0.0, 0.0)
+    _shift(db, well_id, day, False, oil, gas, water)
+    db.execute(insert(ProductionCumulative).values(
+        well_id=well_id,
+        date=day,
+        cum_oil=previous[0] + oil,
+        cum_gas=previous[1] + gas,
+        cum_water=previous[2] + water,
+    ))
+
+
+def record_update(
+    db: Session, well_id: int, day: date,
+    oil_delta: float, gas_delta: float, water_delta: float,
+) -> None:
+    """Apply a change in a row's volumes to its entry and every later one."""
+    _shift(db, well_id, day, True, oil_delta, gas_delta, water_delta)
+
+
+def record_delete(
+    db: Session, well_id: int, day: date,
+    oil: Optional[float], gas: Optional[float], water: Optional[float],
+) -> None:
+    """Remove a production row from the index."""
+    oil, gas, water = _volumes(oil, gas, water)
+    db.execute(
+        delete(ProductionCumulative)
+        .where(ProductionCumulative.well_id == well_id, ProductionCumulative.date == day)
+        .execution_options(synchronize_session=False)
+    )
+    _shift(db, well_id, day, False, -oil, -gas, -water)
+
+
+def record_updates(db: Session, deltas: List[Tuple[int, date, float, float, float]]) -> None:
+    """Apply (well_id, date, oil, gas, water) deltas from a batch update as one executemany."""
+    deltas = [delta for delta in deltas if any(delta[2:])]
+    if not deltas:
+        return
+    table = ProductionCumulative.__table__
+    stmt = (
+        update(table)
+        .where(table.c.well_id == bindparam("c_well_id"), table.c.date >= bindparam("c_date"))
+        .values(
+            cum_oil=table.c.cum_oil + bindparam("c_oil"),
+            cum_gas=table.c.cum_gas + bindparam("c_gas"),
+            cum_water=table.c.cum_water + bindparam("c_water"),
+        )
+    )
+    db.connection().execute(stmt, [
+        {"c_well_id": well_id, "c_date": day, "c_oil": oil, "c_gas": gas, "c_water": water}
+        for well_id, day, oil, gas, water in deltas
+    ])
+
+
+def record_inserts(db: Session, rows: List[Tuple[int, date, Optional[float], Optional[float], Optional[float]]]) -> None:
+    """
+    Add newly inserted (well_id, date, oil, gas, water) rows to the index.
+
+    Rows after a well's last entry, the usual case for appended history, are written
+    in one bulk insert as running sums from that entry; rows filling gaps before it
+    go through ``record_insert``. Cost is proportional to the batch, not the history.
+    """
+    by_well: Dict[int, List[Tuple[date, float, float, float]]] = {}
+    for well_id, day, oil, gas, water in rows:
+        by_well.setdefault(well_id, []).append((day, *_volumes(oil, gas, water)))
+
+    entries = []
+    well_ids = sorted(by_well)
+    for start in range(0, len(well_ids), 500):
+        chunk = well_ids[start:start + 500]
+        latest = (
+            select(ProductionCumulative.well_id, func.max(ProductionCumulative.date).label("date"))
+            .where(ProductionCumulative.well_id.in_(chunk))
+            .group_by(ProductionCumulative.well_id)
+            .subquery()
+        )
+        last = {
+            well_id: (day, [oil, gas, water])
+            for well_id, day, oil, gas, water in db.execute(
+                select(
+                    ProductionCumulative.well_id, ProductionCumulative.date,
+                    ProductionCumulative.cum_oil, ProductionCumulative.cum_gas, ProductionCumulative.cum_water,
+                ).join(
+                    latest,
+                    (ProductionCumulative.well_id == latest.c.well_id) & (ProductionCumulative.date == latest.c.date),
+                )
+            )
+        }
+        for well_id in chunk:
+            last_day, totals = last.get(well_id, (None, [0.0, 0.0, 0.0]))
+            for day, *volumes in sorted(by_well[well_id]):
+                if last_day is not None and day < last_day:
+                    record_insert(db, well_id, day, *volumes)
+                    # Shifted the last entry along with every other later one
+                    totals = [total + volume for total, volume in zip(totals, volumes)]
+                    continue
+                totals = [total + volume for total, volume in zip(totals, volumes)]
+                entries.append({
+                    "well_id": well_id, "date": day, "cum_oil": totals[0], "cum_gas": totals[1], "cum_water": totals[2],
+                })
+    for offset in range(0, len(entries), 5000):
+        db.execute(insert(ProductionCumulative), entries[offset:offset + 5000])
+
+
+def rebuild_wells(db: Session, well_ids: Iterable[int]) -> int:
+    """
+    Recompute the entries of the given wells from the database and archive.
+
+    Runs in the caller's transaction; returns the number of entries written.
+    """
+    well_ids = sorted(set(well_ids))
+    written = 0
+    for start in range(0, len(well_ids), REBUILD_CHUNK_WELLS):
+        chunk = well_ids[start:start + REBUILD_CHUNK_WELLS]
+        db.execute(
+            delete(ProductionCumulative)
+            .where(ProductionCumulative.well_id.in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+        hot = pd.DataFrame(
+            db.execute(
+                select(ProductionData.well_id, ProductionData.date, *(getattr(ProductionData, c) for c in VOLUMES))
+                .where(ProductionData.well_id.in_(chunk), not_archived())
+            ).all(),
+            columns=["well_id", "date"] + VOLUMES,
+        )
+        frames = [frame for frame in (scan_archive(well_ids=chunk, columns=["well_id", "date"] + VOLUMES), hot)
+                  if not frame.empty]
+        if not frames:
+            continue
+
+        frame = pd.concat(frames, ignore_index=True)
+        frame[VOLUMES] = frame[VOLUMES].astype(float).fillna(0.0)
+        frame = frame.groupby(["well_id", "date"], as_index=False)[VOLUMES].sum().sort_values(["well_id", "date"])
+        sums = frame.groupby("well_id")[VOLUMES].cumsum()
+        rows = [
+            {"well_id": int(well_id), "date": day, "cum_oil": oil, "cum_gas": gas, "cum_water": water}
+            for well_id, day, oil, gas, water in zip(
+                frame["well_id"], frame["date"], sums["oil_volume"], sums["gas_volume"], sums["water_volume"]
+            )
+        ]
+        for offset in range(0, len(rows), 5000):
+            db.execute(insert(ProductionCumulative), rows[offset:offset + 5000])
+        written += len(rows)
+    return written
+
+
+def delete_well(db: Session, well_id: int) -> None:
+    db.execute(
+        delete(ProductionCumulative)
+        .where(ProductionCumulative.well_id == well_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _entry_before(bound: Optional[date], inclusive: bool):
+    """Correlated lookup of a well's last entry on (or strictly before) ``bound``."""
+    entry = aliased(ProductionCumulative)
+    stmt = select(entry.id).where(entry.well_id == Well.id)
+    if bound is not None:
+        stmt = stmt.where(entry.date <= bound if inclusive else entry.date < bound)
+    return stmt.order_by(entry.date.desc()).limit(1).correlate(Well).scalar_subquery()
+
+
+def range_totals(
+    db: Session,
+    well_id: Optional[int] = None,
+    well_name: Optional[str] = None,
+    region: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict]:
+    """
+    Per-well oil, gas and water produced between ``start_date`` and ``end_date`` inclusive.
+
+    Without ``start_date`` the totals cover all history up to ``end_date`` (cumulative
+    production as of that date); without ``end_date`` they run to the latest entry.
+    """
+    end_entry = aliased(ProductionCumulative)
+    start_entry = aliased(ProductionCumulative)
+    columns = [Well.id, Well.name, Well.region, end_entry.cum_oil, end_entry.cum_gas, end_entry.cum_water]
+    query = db.query(*columns).select_from(Well).outerjoin(end_entry, end_entry.id == _entry_before(end_date, True))
+    if start_date is not None:
+        query = query.add_columns(start_entry.cum_oil, start_entry.cum_gas, start_entry.cum_water).outerjoin(
+            start_entry, start_entry.id == _entry_before(start_date, False)
+        )
+    if well_id is not None:
+        query = query.filter(Well.id == well_id)
+    if well_name:
+        query = query.filter(Well.name == well_name)
+    if region:
+        query = query.filter(Well.region == region)
+
+    totals = []
+    for row in query.order_by(Well.id).all():
+        end_values = [value or 0.0 for value in row[3:6]]
+        start_values = [value or 0.0 for value in row[6:9]] if start_date is not None else [0.0, 0.0, 0.0]
+        totals.append({
+            "well_id": row[0],
+            "well_name": row[1],
+            "region": row[2],
+            **{column: end - begin for column, end, begin in zip(VOLUMES, end_values, start_values)},
+        })
+    return totals
+
+
+def rebuild_cumulative(db: Session, ctx: Optional[JobContext] = None) -> int:
+    """Rebuild the index for every well, committing per chunk of wells."""
+    well_ids = db.scalars(select(Well.id).order_by(Well.id)).all()
+    written = 0
+    for start in range(0, len(well_ids), REBUILD_CHUNK_WELLS):
+        written += rebuild_wells(db, well_ids[start:start + REBUILD_CHUNK_WELLS])
+        db.commit()
+        if ctx is not None:
+            done = min(start + REBUILD_CHUNK_WELLS, len(well_ids))
+            ctx.progress(done / len(well_ids), f"{done}/{len(well_ids)} wells rebuilt")
+    # Entries of wells deleted outside the API
+    db.execute(
+        delete(ProductionCumulative)
+        .where(ProductionCumulative.well_id.not_in(select(Well.id)))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    logger.info(f"Rebuilt cumulative production index ({written} entries)")
+    return written
+
+
+def ensure_cumulative(db: Session) -> bool:
+    """
+    Build the index if it is empty while production exists, as after upgrading to it.
+
+    Returns whether it was built.
+    """
+    if db.query(ProductionCumulative.id).first() is not None:
+        return False
+    if db.query(ProductionData.id).first() is None and archive_cutoff() is None:
+        return False
+    logger.info("Cumulative production index is empty, building it")
+    rebuild_cumulative(db)
+    return True
+
+
+@register_job("rebuild_cumulative")
+def rebuild_cumulative_job(ctx: JobContext) -> None:
+    """Recompute the per-well cumulative production index."""
+    db = SessionLocal()
+    try:
+        rebuild_cumulative(db, ctx)
+    finally:
+        db.close()
@@ -0,0 +1,229 @@
+"""
+Dashboard bundle: wells, daily series, regional totals and the first table page in one response.
+
+All parts are read from one consistent view of the database. On PostgreSQL the
+request's transaction exports its snapshot (``pg_export_snapshot``) and each part
+runs concurrently on a worker connection, from a pool reserved for the workers,
+that imports it with ``SET TRANSACTION SNAPSHOT``; other dialects compute the parts one after another
+on the request's session. Finished bundles are cached as serialized JSON, keyed
+by the filters and the change-log position they were read at.
+"""
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from threading import Lock
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.schemas.dashboard import DashboardBundle
+from app.services.archive import not_archived, read_archived_production
+from app.services.changelog import latest_version
+from app.services.production_service import query_production_page
+
+VOLUMES = ("oil_volume", "gas_volume", "water_volume")
+_SNAPSHOT_ID = re.compile(r"^[0-9A-Fa-f]+-[0-9A-Fa-f]+(-[0-9]+)?$")
+_bundle_adapter = TypeAdapter(DashboardBundle)
+_executor = ThreadPoolExecutor(max_workers=settings.DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+_worker_engines: Dict[URL, Engine] = {}
+_worker_engines_lock = Lock()
+
+
+class BundleCache:
+    """Thread-safe LRU of serialized bundles with a time-to-live."""
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+bundle_cache = BundleCache(settings.DASHBOARD_CACHE_SIZE, settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def _filter(query, region, well_name, start_date, end_date):
+    query = query.filter(not_archived())
+    if region:
+        query = query.filter(Well.region == region)
+    if well_name:
+        query = query.filter(Well.name == well_name)
+    if start_date:
+        query = query.filter(ProductionData.date >= start_date)
+    if end_date:
+        query = query.filter(ProductionData.date <= end_date)
+    return query
+
+
+def _wells(db: Session, region, well_name, start_date, end_date) -> List[Well]:
+    query = db.query(Well)
+    if region:
+        query = query.filter(Well.region == region)
+    if well_name:
+        query = query.filter(Well.name == well_name)
+    return query.order_by(Well.id).all()
+
+
+def _series(db: Session, region, well_name, start_date, end_date) -> Dict[date, List[float]]:
+    query = db.query(
+        ProductionData.date,
+        *(func.coalesce(func.sum(getattr(ProductionData, column)), 0.0) for column in VOLUMES),
+    ).join(Well, ProductionData.well_id == Well.id)
+    query = _filter(query, region, well_name, start_date, end_date).group_by(ProductionData.date)
+    return {day: list(volumes) for day, *volumes in query.all()}
+
+
+def _regions(db: Session, region, well_name, start_date, end_date) -> Dict[Optional[str], List[float]]:
+    query = db.query(
+        Well.region,
+        *(func.coalesce(func.sum(getattr(ProductionData, column)), 0.0) for column in VOLUMES),
+    ).join(Well, ProductionData.well_id == Well.id)
+    query = _filter(query, region, well_name, start_date, end_date).group_by(Well.region)
+    return {well_region: list(volumes) for well_region, *volumes in query.all()}
+
+
+def _archive(db: Session, region, well_name, start_date, end_date) -> List[Dict]:
+    return read_archived_production(
+        db, region=region, well_name=well_name, start_date=start_date, end_date=end_date,
+        columns=["well_id", "date", *VOLUMES],
+    )
+
+
+def _page(db: Session, region, well_name, start_date, end_date, page_size: int) -> List[Dict]:
+    # The shared snapshot file is not the database snapshot the other parts read
+    return query_production_page(db, region, well_name, start_date, end_date, 0, page_size, use_snapshot=False)
+
+
+def _worker_engine(bind: Engine) -> Engine:
+    """
+    Engine for the part workers on ``bind``'s database, with one connection per worker thread.
+
+    Workers never draw from the request pool, which the exporting requests already
+    hold connections of, so concurrent dashboards cannot exhaust it and deadlock.
+    """
+    with _worker_engines_lock:
+        engine = _worker_engines.get(bind.url)
+        if engine is None:
+            engine = _worker_engines[bind.url] = create_engine(
+                bind.url, pool_size=settings.DASHBOARD_WORKERS, max_overflow=0, pool_pre_ping=True
+            )
+        return engine
+
+
+def _export_snapshot(db: Session) -> Optional[str]:
+    """Export the request transaction's snapshot for worker connections, or None if unsupported."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    try:
+        with db.begin_nested():
+            snapshot_id = db.execute(text("SELECT pg_export_snapshot()")).scalar()
+    except DBAPIError as e:
+        logger.warning(f"Cannot export snapshot, computing dashboard sequentially: {str(e)}")
+        return None
+    return snapshot_id if _SNAPSHOT_ID.match(snapshot_id or "") else None
+
+
+def _in_snapshot(bind, snapshot_id: str, part: Callable[[Session], object]):
+    db = SessionLocal(bind=bind)
+    db.info["read_only"] = True
+    try:
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        db.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+        return part(db)
+    finally:
+        db.rollback()
+        db.close()
+
+
+def build_dashboard(
+    db: Session,
+    region: Optional[str] = None,
+    well_name: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    page_size: int = 100,
+) -> bytes:
+    """
+    Return the serialized dashboard bundle for the filters, from cache when nothing has changed.
+
+    ``db`` must not have run any statement yet: its transaction defines the snapshot.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    filters = (region, well_name, start_date, end_date)
+    # Versions are allocated in commit order, so the highest one identifies the view
+    version = latest_version(db)
+    key = (filters, page_size, version, db.info.get("read_only"))
+    body = bundle_cache.get(key)
+    if body is not None:
+        return body
+
+    parts: Dict[str, Callable[[Session], object]] = {
+        "wells": lambda s: _wells(s, *filters),
+        "series": lambda s: _series(s, *filters),
+        "regions": lambda s: _regions(s, *filters),
+        "archive": lambda s: _archive(s, *filters),
+        "page": lambda s: _page(s, *filters, page_size),
+    }
+    snapshot_id = _export_snapshot(db)
+    if snapshot_id is not None:
+        bind = _worker_engine(db.get_bind())
+        futures = {name: _executor.submit(_in_snapshot, bind, snapshot_id, part) for name, part in parts.items()}
+        # The exporting transaction stays open (and the snapshot importable) until every part is done
+        results = {name: future.result() for name, future in futures.items()}
+    else:
+        results = {name: part(db) for name, part in parts.items()}
+
+    series, regions = results["series"], results["regions"]
+    for row in results["archive"]:
+        volumes = [row[column] or 0.0 for column in VOLUMES]
+        day = series.setdefault(row["date"], [0.0, 0.0, 0.0])
+        total = regions.setdefault(row["region"], [0.0, 0.0, 0.0])
+        for index, volume in enumerate(volumes):
+            day[index] += volume
+            total[index] += volume
+
+    body = _bundle_adapter.dump_json(DashboardBundle.model_validate({
+        "version": version,
+        "wells": [{"id": well.id, "name": well.name, "latitude": well.latitude,
+                   "longitude": well.longitude, "region": well.region} for well in results["wells"]],
+        "series": [dict(zip(("date", *VOLUMES), (day, *volumes))) for day, volumes in sorted(series.items())],
+        "regions": [
+            dict(zip(("region", *VOLUMES), (well_region, *volumes)))
+            for well_region, volumes in sorted(regions.items(), key=lambda item: item[0] or "")
+        ],
+        "page": results["page"],
+    }))
+    bundle_cache.put(key, body)
+    return body
@@ -0,0 +1,379 @@
+"""
+Incremental ingestion of production CSV files dropped under ``DATA_DIR/INGEST_DIR``.
+
+Files use the sample data format (well_name, date, production_volume, latitude,
+longitude, region). Each file has a checkpoint row holding the byte offset read so
+far and a hash of its first bytes; the offset advances in the same transaction as
+the rows it covers, so every complete line is applied exactly once even across
+crashes and concurrent ingesters. Appended lines are picked up on the next poll,
+a partial last line waits until it is terminated, and a file whose head no longer
+matches its hash has been replaced and is read again from the start.
+
+Malformed rows of the batch starting at byte ``offset`` are written to
+``INGEST_DIR/rejected/<file>.<offset>.csv`` with the reason; a batch retried after a
+failed commit rewrites the same file instead of duplicating its rows.
+
+Run ``python -m app.services.ingest`` to watch the directory, or with ``--once``
+for a single pass; the ``ingest`` job does a single pass inside the API.
+"""
+import argparse
+import csv
+import hashlib
+import math
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models.ingest import IngestCheckpoint
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.schemas.production import ProductionVolumeUpdate
+from app.services import cumulative
+from app.services.archive import ArchivedDateError, write_cutoff
+from app.services.changelog import INSERT, UPDATE, production_payload, record_change, well_payload
+from app.services.jobs import JobContext, register_job
+from app.services.production_service import bulk_update_volumes
+from app.services.sketches import move_well_samples, record_samples
+
+COLUMNS = ["well_name", "date", "production_volume", "latitude", "longitude", "region"]
+REJECTED_DIR = "rejected"
+
+
+def ingest_root() -> Path:
+    return Path(settings.DATA_DIR) / settings.INGEST_DIR
+
+
+def _head_hash(path: Path, length: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read(min(length, settings.INGEST_HEAD_BYTES))).hexdigest()
+
+
+def _parse_row(values: List[str], header: List[str]) -> Dict:
+    if len(values) != len(header):
+        raise ValueError(f"expected {len(header)} fields, got {len(values)}")
+    record = dict(zip(header, (value.strip() for value in values)))
+    if not record["well_name"]:
+        raise ValueError("well_name is empty")
+    volume = float(record["production_volume"])
+    if not math.isfinite(volume) or volume < 0:
+        raise ValueError(f"invalid production_volume {record['production_volume']!r}")
+    latitude, longitude = float(record["latitude"]), float(record["longitude"])
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"coordinates out of range ({latitude}, {longitude})")
+    return {
+        "well_name": record["well_name"],
+        "date": datetime.strptime(record["date"], "%Y-%m-%d").date(),
+        "oil_volume": volume,
+        "latitude": latitude,
+        "longitude": longitude,
+        "region": record["region"] or None,
+    }
+
+
+def _quarantine(name: str, offset: int, header: List[str], rejected: List[Tuple[int, List[str], str]]) -> None:
+    """Write the rejected lines of the batch read from ``offset``, replacing any earlier attempt's file."""
+    directory = ingest_root() / REJECTED_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.{offset}.csv"
+    partial = path.with_suffix(".tmp")
+    with open(partial, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header + ["source_offset", "error"])
+        for line_offset, values, error in rejected:
+            writer.writerow(values + [line_offset, error])
+    os.replace(partial, path)
+
+
+def _complete_size(path: Path, size: int, offset: int) -> int:
+    """Bytes up to and including the file's last newline, but not before ``offset``."""
+    with open(path, "rb") as f:
+        end = size
+        while end > offset:
+            start = max(end - 65536, offset)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return offset
+
+
+def _read_lines(path: Path, offset: int, limit: int) -> Tuple[List[Tuple[int, bytes]], int]:
+    """Read up to ``limit`` complete lines from ``offset``; returns (offset, line) pairs and the new offset."""
+    lines = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while len(lines) < limit:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                # EOF or a line still being written
+                break
+            lines.append((offset, line))
+            offset += len(line)
+    return lines, offset
+
+
+def _lock_checkpoint(db: Session, name: str) -> IngestCheckpoint:
+    query = db.query(IngestCheckpoint).filter(IngestCheckpoint.path == name)
+    checkpoint = query.with_for_update().first()
+    if checkpoint is not None:
+        return checkpoint
+    try:
+        with db.begin_nested():
+            checkpoint = IngestCheckpoint(path=name, offset=0, rows_ingested=0, rows_rejected=0, busy_seconds=0.0)
+            db.add(checkpoint)
+        return checkpoint
+    except IntegrityError:
+        return query.with_for_update().one()
+
+
+def upsert_wells(db: Session, rows: List[Dict]) -> Dict[str, Well]:
+    """Create or update the wells named in parsed rows; returns them by name."""
+    latest = {row["well_name"]: (row["latitude"], row["longitude"], row["region"]) for row in rows}
+    wells = {well.name: well for well in db.query(Well).filter(Well.name.in_(list(latest)))}
+    created = []
+    for name, (latitude, longitude, region) in latest.items():
+        well = wells.get(name)
+        if well is None:
+            well = wells[name] = Well(name=name, latitude=latitude, longitude=longitude, region=region)
+            db.add(well)
+            created.append(well)
+        elif (well.latitude, well.longitude, well.region) != (latitude, longitude, region):
+            change = well_payload(well)
+            if well.region != region:
+                move_well_samples(db, well.id, well.region, region)
+                change["previous"] = {"name": well.name, "region": well.region}
+            well.latitude, well.longitude, well.region = latitude, longitude, region
+            change.update(latitude=latitude, longitude=longitude, region=region)
+            record_change(db, "well", UPDATE, well.id, change)
+    db.flush()
+    for well in created:
+        record_change(db, "well", INSERT, well.id, well_payload(well))
+    return wells
+
+
+def upsert_production(db: Session, rows: List[Dict], wells: Dict[str, Well]) -> None:
+    """Insert or update the oil volume of parsed rows by well and date."""
+    # Later lines for the same well and day win
+    volumes = {(wells[row["well_name"]].id, row["date"]): row["oil_volume"] for row in rows}
+    keys = list(volumes)
+    existing = set()
+    for start in range(0, len(keys), 500):
+        existing.update(
+            tuple(key) for key in db.execute(
+                select(ProductionData.well_id, ProductionData.date)
+                .where(tuple_(ProductionData.well_id, ProductionData.date).in_(keys[start:start + 500]))
+            )
+        )
+
+    bulk_update_volumes(db, [
+        ProductionVolumeUpdate(well_id=well_id, date=day, oil_volume=volumes[(well_id, day)])
+        for well_id, day in keys if (well_id, day) in existing
+    ])
+
+    new_keys = [key for key in keys if key not in existing]
+    if not new_keys:
+        return
+    db.execute(insert(ProductionData), [
+        {"well_id": well_id, "date": day, "oil_volume": volumes[(well_id, day)], "gas_volume": 0.0, "water_volume": 0.0}
+        for well_id, day in new_keys
+    ])
+    regions = {well.id: well.region for well in wells.values()}
+    samples = []
+    for start in range(0, len(new_keys), 500):
+        for production in db.scalars(
+            select(ProductionData)
+            .where(tuple_(ProductionData.well_id, ProductionData.date).in_(new_keys[start:start + 500]))
+        ):
+            record_change(db, "production", INSERT, production.id, production_payload(production))
+            samples.append((regions[production.well_id], production.date, production.well_id, production.oil_volume))
+    record_samples(db, samples)
+    cumulative.record_inserts(db, [
+        (well_id, day, volumes[(well_id, day)], 0.0, 0.0) for well_id, day in new_keys
+    ])
+
+
+def ingest_file(db: Session, path: Path) -> Tuple[int, int]:
+    """
+    Ingest the unread complete lines of one file; returns (rows ingested, rows rejected).
+    """
+    name = path.name
+    ingested = rejected_total = 0
+    while True:
+        started = time.monotonic()
+        checkpoint = _lock_checkpoint(db, name)
+        size = path.stat().st_size
+        if checkpoint.offset and (
+            size < checkpoint.offset or _head_hash(path, checkpoint.offset) != checkpoint.head_hash
+        ):
+            logger.warning(f"{name} was truncated or replaced; ingesting it again from the start")
+            checkpoint.offset, checkpoint.header = 0, None
+        start_offset = checkpoint.offset
+
+        if checkpoint.header is None:
+            lines, offset = _read_lines(path, 0, 1)
+            if not lines:
+                db.rollback()
+                return ingested, rejected_total
+            header = next(csv.reader([lines[0][1].decode("utf-8-sig")]))
+            header = [column.strip() for column in header]
+            missing = set(COLUMNS) - set(header)
+            if missing:
+                db.rollback()
+                target = ingest_root() / REJECTED_DIR / name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(path, target)
+                logger.error(f"Quarantined {name}: missing columns {sorted(missing)}")
+                return ingested, rejected_total
+            checkpoint.header = ",".join(header)
+            checkpoint.offset = start_offset = offset
+            checkpoint.head_hash = _head_hash(path, offset)
+        header = checkpoint.header.split(",")
+
+        lines, end_offset = _read_lines(path, start_offset, settings.INGEST_BATCH_ROWS)
+        if not lines:
+            # Commit a newly read header, release the lock otherwise
+            db.commit()
+            return ingested, rejected_total
+
+        rows, rejected = [], []
+        cutoff = write_cutoff()
+        for line_offset, line in lines:
+            values = []
+            try:
+                values = next(csv.reader([line.decode("utf-8")]), [])
+                if not values:
+                    continue
+                row = _parse_row(values, header)
+                if cutoff is not None and row["date"] < cutoff:
+                    raise ArchivedDateError(f"date {row['date'].isoformat()} is archived (before {cutoff.isoformat()})")
+                rows.append(row)
+            except (ValueError, UnicodeDecodeError) as e:
+                rejected.append((line_offset, values, str(e)))
+
+        if rows:
+            wells = upsert_wells(db, rows)
+            upsert_production(db, rows, wells)
+        if rejected:
+            _quarantine(name, start_offset, header, rejected)
+
+        elapsed = time.monotonic() - started
+        checkpoint.offset = end_offset
+        checkpoint.head_hash = _head_hash(path, end_offset)
+        checkpoint.rows_ingested += len(rows)
+        checkpoint.rows_rejected += len(rejected)
+        checkpoint.busy_seconds += elapsed
+        checkpoint.updated_at = datetime.utcnow()
+        db.commit()
+
+        ingested += len(rows)
+        rejected_total += len(rejected)
+        logger.info(
+            f"Ingested {len(rows)} rows ({len(rejected)} rejected) from {name} "
+            f"at {len(lines) / max(elapsed, 1e-6):.0f} rows/s"
+        )
+
+
+def ingest_once(db: Session, ctx: Optional[JobContext] = None) -> Dict[str, int]:
+    """Ingest every file in the drop folder, oldest first."""
+    root = ingest_root()
+    root.mkdir(parents=True, exist_ok=True)
+    files = sorted(root.glob("*.csv"), key=lambda path: path.stat().st_mtime)
+    totals = {"files": len(files), "rows_ingested": 0, "rows_rejected": 0}
+    for done, path in enumerate(files, start=1):
+        try:
+            ingested, rejected = ingest_file(db, path)
+        except FileNotFoundError:
+            db.rollback()
+            continue
+        totals["rows_ingested"] += ingested
+        totals["rows_rejected"] += rejected
+        if ctx is not None:
+            ctx.progress(done / len(files), f"{done}/{len(files)} files checked")
+    return totals
+
+
+def ingest_status(db: Session) -> Dict:
+    """
+    Per-file progress, bytes still to ingest, lag and processing throughput.
+
+    ``lag_seconds`` is the age of the oldest unread data: how long ago its file was
+    last modified. A partial last line still being written is not pending yet.
+    """
+    root = ingest_root()
+    checkpoints = {checkpoint.path: checkpoint for checkpoint in db.query(IngestCheckpoint)}
+    now = time.time()
+    files, pending_bytes, lag = [], 0, 0.0
+    for path in sorted(root.glob("*.csv")) if root.exists() else []:
+        stat = path.stat()
+        checkpoint = checkpoints.get(path.name)
+        offset = checkpoint.offset if checkpoint else 0
+        pending = _complete_size(path, stat.st_size, offset) - offset if stat.st_size > offset else 0
+        pending_bytes += pending
+        if pending:
+            lag = max(lag, now - stat.st_mtime)
+        files.append({
+            "file": path.name,
+            "size": stat.st_size,
+            "offset": offset,
+            "pending_bytes": pending,
+            "rows_ingested": checkpoint.rows_ingested if checkpoint else 0,
+            "rows_rejected": checkpoint.rows_rejected if checkpoint else 0,
+            "updated_at": checkpoint.updated_at if checkpoint else None,
+        })
+    rows = sum(checkpoint.rows_ingested + checkpoint.rows_rejected for checkpoint in checkpoints.values())
+    busy = sum(checkpoint.busy_seconds for checkpoint in checkpoints.values())
+    return {
+        "pending_bytes": pending_bytes,
+        "lag_seconds": lag,
+        "rows_ingested": sum(checkpoint.rows_ingested for checkpoint in checkpoints.values()),
+        "rows_rejected": sum(checkpoint.rows_rejected for checkpoint in checkpoints.values()),
+        "rows_per_second": rows / busy if busy else None,
+        "files": files,
+    }
+
+
+@register_job("ingest")
+def ingest_job(ctx: JobContext) -> None:
+    """Ingest new and appended files from the drop folder once."""
+    db = SessionLocal()
+    try:
+        totals = ingest_once(db, ctx)
+        ctx.progress(1.0, f"{totals['rows_ingested']} rows ingested, {totals['rows_rejected']} rejected")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest production CSV files from the drop folder.")
+    parser.add_argument("--once", action="store_true", help="ingest pending files and exit")
+    args = parser.parse_args()
+
+    logger.info(f"Watching {ingest_root()} every {settings.INGEST_POLL_SECONDS}s")
+    while True:
+        db = SessionLocal()
+        try:
+            totals = ingest_once(db)
+        except Exception as e:
+            logger.error(f"Ingestion pass failed: {str(e)}")
+            if args.once:
+                raise
+        finally:
+            db.close()
+        if args.once:
+            logger.info(f"Ingested {totals['rows_ingested']} rows, rejected {totals['rows_rejected']}")
+            return
+        time.sleep(settings.INGEST_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
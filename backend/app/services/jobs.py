@@ -0,0 +1,522 @@
+import csv
+import inspect
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, get_type_hints
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal, reset_engine_after_fork
+from app.models.job import Job
+from app.models.production import ProductionData
+from app.models.well import Well
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+PENDING_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+# pg_advisory_xact_lock key serializing the pending-job count and insert across workers
+SUBMIT_LOCK_KEY = 0x6A6F6273
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when cancellation has been requested."""
+
+
+class JobQueueFull(Exception):
+    """Raised when the maximum number of jobs is already queued or running."""
+
+
+class InvalidJobParams(ValueError):
+    """Raised when submitted params do not match the job handler's signature."""
+
+
+@dataclass
+class JobDefinition:
+    func: Callable[..., Optional[str]]
+    executor: str = "thread"
+
+
+@dataclass
+class JobSchedule:
+    job_type: str
+    interval: float
+    params: Dict[str, Any]
+    when: Optional[Callable[[Session], bool]] = None
+
+
+_registry: Dict[str, JobDefinition] = {}
+_schedules: List[JobSchedule] = []
+
+
+def register_job(job_type: str, executor: str = "thread"):
+    """
+    Register a job handler.
+
+    Handlers are called as ``func(ctx, **params)`` and may return the path of a
+    result file. ``executor`` is ``"thread"`` for I/O-bound work or ``"process"``
+    for CPU-bound work; process handlers must be module-level functions.
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unknown executor '{executor}'")
+
+    def decorator(func):
+        _registry[job_type] = JobDefinition(func=func, executor=executor)
+        return func
+
+    return decorator
+
+
+def schedule_job(
+    job_type: str,
+    interval: float,
+    params: Optional[Dict[str, Any]] = None,
+    when: Optional[Callable[[Session], bool]] = None,
+) -> None:
+    """
+    Submit ``job_type`` at most every ``interval`` seconds from whichever API worker gets there first.
+
+    Schedules are checked on each heartbeat pass. A job is not submitted while
+    another of the same type is queued or running, nor when ``when(db)`` returns
+    False. A non-positive ``interval`` disables the schedule.
+    """
+    if interval > 0:
+        _schedules.append(JobSchedule(job_type=job_type, interval=interval, params=params or {}, when=when))
+
+
+def job_types() -> Dict[str, str]:
+    return {job_type: definition.executor for job_type, definition in _registry.items()}
+
+
+def validate_params(job_type: str, params: Dict[str, Any]) -> None:
+    """
+    Check params against the handler's keyword parameters and their annotations.
+
+    Raises KeyError for an unknown job type and InvalidJobParams for unknown,
+    missing or mistyped params.
+    """
+    func = _registry[job_type].func
+    signature = inspect.signature(func)
+    try:
+        bound = signature.bind(None, **params)
+    except TypeError as e:
+        raise InvalidJobParams(str(e))
+    hints = get_type_hints(func)
+    for name, value in list(bound.arguments.items())[1:]:
+        if name not in hints:
+            continue
+        try:
+            TypeAdapter(hints[name]).validate_python(value, strict=True)
+        except ValidationError as e:
+            raise InvalidJobParams(f"{name}: {e.errors()[0]['msg']}")
+
+
+def results_dir() -> Path:
+    path = Path(settings.DATA_DIR) / settings.JOB_RESULTS_DIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class JobContext:
+    """
+    Handle passed to job handlers for reporting progress and observing cancellation.
+    """
+
+    def __init__(self, job_id: int, params: Dict[str, Any]):
+        self.job_id = job_id
+        self.params = params
+        self._last_check = 0.0
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        """Persist progress (0..1) and raise JobCancelled if a cancel was requested."""
+        now = time.monotonic()
+        if fraction < 1.0 and now - self._last_check < settings.JOB_PROGRESS_INTERVAL:
+            return
+        self._last_check = now
+        db = SessionLocal()
+        try:
+            job = db.get(Job, self.job_id)
+            job.progress = max(0.0, min(fraction, 1.0))
+            if message is not None:
+                job.message = message
+            db.commit()
+            if job.cancel_requested:
+                raise JobCancelled()
+        finally:
+            db.close()
+
+    def check_cancelled(self) -> None:
+        db = SessionLocal()
+        try:
+            if db.query(Job.cancel_requested).filter(Job.id == self.job_id).scalar():
+                raise JobCancelled()
+        finally:
+            db.close()
+
+
+def _finish(db: Session, job: Job, status: str, **fields) -> None:
+    job.status = status
+    job.finished_at = datetime.utcnow()
+    for field, value in fields.items():
+        setattr(job, field, value)
+    db.commit()
+
+
+def _run_job(job_id: int, func: Callable[..., Optional[str]]) -> None:
+    """Execute one job inside a pool worker and record its outcome."""
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if job is None:
+            return
+        if job.cancel_requested:
+            _finish(db, job, JOB_CANCELLED)
+            return
+
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        db.commit()
+        params = dict(job.params or {})
+
+        ctx = JobContext(job_id, params)
+        try:
+            result_path = func(ctx, **params)
+        except JobCancelled:
+            db.refresh(job)
+            _finish(db, job, JOB_CANCELLED)
+            logger.info(f"Job {job_id} ({job.job_type}) cancelled")
+            return
+        except Exception as e:
+            db.refresh(job)
+            _finish(db, job, JOB_FAILED, error=str(e))
+            logger.error(f"Job {job_id} ({job.job_type}) failed: {str(e)}")
+            return
+
+        db.refresh(job)
+        _finish(db, job, JOB_SUCCEEDED, progress=1.0, result_path=result_path)
+        logger.info(f"Job {job_id} ({job.job_type}) succeeded")
+    finally:
+        db.close()
+
+
+def _init_process_worker() -> None:
+    # Forked children must not reuse the parent's pooled connections
+    reset_engine_after_fork()
+
+
+class JobRunner:
+    """
+    In-process job runner with bounded thread and process pools.
+
+    Job state lives in the ``jobs`` table, so any API worker can report status;
+    only the worker that accepted a job can drop it from its queue before it starts.
+    Each worker refreshes ``heartbeat_at`` on the jobs it holds every
+    JOB_HEARTBEAT_SECONDS. Jobs whose heartbeat is older than JOB_STALE_SECONDS
+    belonged to a worker that stopped: queued ones are taken over and run here,
+    running ones are marked failed.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[int, Future] = {}
+        self._heartbeat: Optional[Thread] = None
+        self._stop = Event()
+
+    def _executor(self, kind: str):
+        with self._lock:
+            if kind == "process":
+                if self._processes is None:
+                    # Forking while other jobs' threads hold locks (logging, connection pools)
+                    # can leave the child blocked forever; a fork server is single-threaded
+                    self._processes = ProcessPoolExecutor(
+                        max_workers=settings.JOB_PROCESS_WORKERS,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                        initializer=_init_process_worker,
+                    )
+                return self._processes
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    max_workers=settings.JOB_THREAD_WORKERS,
+                    thread_name_prefix="job",
+                )
+            return self._threads
+
+    def pending(self, db: Session) -> int:
+        """Number of queued and running jobs across all workers."""
+        return db.scalar(select(func.count(Job.id)).where(Job.status.in_(PENDING_STATUSES)))
+
+    def submit(self, db: Session, job_type: str, params: Optional[Dict[str, Any]] = None) -> Job:
+        params = params or {}
+        validate_params(job_type, params)
+        self._lock_submissions(db)
+        if self.pending(db) >= settings.JOB_MAX_PENDING:
+            db.rollback()
+            raise JobQueueFull()
+        return self._create(db, job_type, params)
+
+    def _lock_submissions(self, db: Session) -> None:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(select(func.pg_advisory_xact_lock(SUBMIT_LOCK_KEY)))
+
+    def _create(self, db: Session, job_type: str, params: Dict[str, Any]) -> Job:
+        now = datetime.utcnow()
+        job = Job(
+            job_type=job_type,
+            status=JOB_QUEUED,
+            params=params,
+            progress=0.0,
+            cancel_requested=False,
+            created_at=now,
+            heartbeat_at=now,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self._enqueue(job.id, _registry[job_type])
+        logger.info(f"Submitted job {job.id} ({job_type})")
+        return job
+
+    def _enqueue(self, job_id: int, definition: JobDefinition) -> None:
+        future = self._executor(definition.executor).submit(_run_job, job_id, definition.func)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _, job_id=job_id: self._forget(job_id))
+
+    def _forget(self, job_id: int) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def cancel(self, db: Session, job: Job) -> Job:
+        if job.status in FINISHED_STATUSES:
+            return job
+        job.cancel_requested = True
+        with self._lock:
+            future = self._futures.get(job.id)
+        if job.status == JOB_QUEUED and future is not None and future.cancel():
+            job.status = JOB_CANCELLED
+            job.finished_at = datetime.utcnow()
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def start(self) -> None:
+        """Start the heartbeat thread; its first pass recovers jobs left behind by stopped workers."""
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._stop = Event()
+            self._heartbeat = Thread(target=self._heartbeat_loop, args=(self._stop,), name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self, stop: Event) -> None:
+        while True:
+            try:
+                self._beat()
+                self.recover()
+                self.run_schedules()
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {str(e)}")
+            if stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+                return
+
+    def _beat(self) -> None:
+        with self._lock:
+            job_ids = list(self._futures)
+        if not job_ids:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.id.in_(job_ids), Job.status.in_(PENDING_STATUSES))
+                .values(heartbeat_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def recover(self) -> int:
+        """
+        Take over queued jobs and fail running jobs whose worker stopped sending heartbeats.
+
+        Each job is claimed with a conditional UPDATE, so only one worker acts on it.
+        Returns the number of jobs recovered.
+        """
+        now = datetime.utcnow()
+        stale = or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < now - timedelta(seconds=settings.JOB_STALE_SECONDS))
+        db = SessionLocal()
+        try:
+            orphans = db.execute(
+                select(Job.id, Job.job_type, Job.status).where(Job.status.in_(PENDING_STATUSES), stale)
+            ).all()
+            recovered = 0
+            for job_id, job_type, job_status in orphans:
+                definition = _registry.get(job_type)
+                if job_status == JOB_QUEUED and definition is not None:
+                    values = {"heartbeat_at": now}
+                else:
+                    values = {"status": JOB_FAILED, "finished_at": now, "error": "Worker stopped before the job finished"}
+                claimed = db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == job_status, stale)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                if not claimed:
+                    continue
+                recovered += 1
+                if "status" in values:
+                    logger.warning(f"Job {job_id} ({job_type}) failed: its worker stopped")
+                else:
+                    self._enqueue(job_id, definition)
+                    logger.info(f"Requeued job {job_id} ({job_type}) from a stopped worker")
+            return recovered
+        finally:
+            db.close()
+
+    def run_schedules(self) -> List[Job]:
+        """Submit the scheduled jobs that are due; returns the jobs submitted."""
+        submitted = []
+        db = SessionLocal()
+        try:
+            for schedule in _schedules:
+                try:
+                    job = self._submit_scheduled(db, schedule)
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Scheduled {schedule.job_type} job not submitted: {str(e)}")
+                    continue
+                if job is not None:
+                    submitted.append(job)
+        finally:
+            db.close()
+        return submitted
+
+    def _submit_scheduled(self, db: Session, schedule: JobSchedule) -> Optional[Job]:
+        # Checked under the submit lock so concurrent workers submit it once
+        self._lock_submissions(db)
+        recent = db.scalar(
+            select(func.count(Job.id)).where(
+                Job.job_type == schedule.job_type,
+                or_(
+                    Job.status.in_(PENDING_STATUSES),
+                    Job.created_at >= datetime.utcnow() - timedelta(seconds=schedule.interval),
+                ),
+            )
+        )
+        if recent or self.pending(db) >= settings.JOB_MAX_PENDING or (
+            schedule.when is not None and not schedule.when(db)
+        ):
+            db.rollback()
+            return None
+        return self._create(db, schedule.job_type, schedule.params)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            threads, processes = self._threads, self._processes
+            self._threads = self._processes = None
+            heartbeat, self._heartbeat = self._heartbeat, None
+            self._stop.set()
+        if heartbeat is not None:
+            heartbeat.join(timeout=1.0)
+        for executor in (threads, processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+
+job_runner = JobRunner()
+
+
+@register_job("export_production")
+def export_production(
+    ctx: JobContext,
+    region: Optional[str] = None,
+    well_name: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> str:
+    """Export filtered production data, archived history included, to a CSV file."""
+    from app.services.archive import not_archived, read_archived_production
+
+    start = date.fromisoformat(start_date) if start_date else None
+    end = date.fromisoformat(end_date) if end_date else None
+    db = SessionLocal()
+    try:
+        archived = read_archived_production(
+            db,
+            region=region,
+            well_name=well_name,
+            start_date=start,
+            end_date=end,
+            columns=["well_id", "date", "oil_volume", "gas_volume", "water_volume"],
+        )
+
+        query = (
+            db.query(
+                Well.name,
+                Well.region,
+                ProductionData.date,
+                ProductionData.oil_volume,
+                ProductionData.gas_volume,
+                ProductionData.water_volume,
+            )
+            .join(Well, ProductionData.well_id == Well.id)
+            .filter(not_archived())
+        )
+        if region:
+            query = query.filter(Well.region == region)
+        if well_name:
+            query = query.filter(Well.name == well_name)
+        if start:
+            query = query.filter(ProductionData.date >= start)
+        if end:
+            query = query.filter(ProductionData.date <= end)
+
+        total = (query.count() + len(archived)) or 1
+        path = results_dir() / f"export-{ctx.job_id}.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["well_name", "region", "date", "oil_volume", "gas_volume", "water_volume"])
+            writer.writerows(
+                [row["well_name"], row["region"], row["date"], row["oil_volume"], row["gas_volume"], row["water_volume"]]
+                for row in archived
+            )
+            for written, row in enumerate(
+                query.order_by(ProductionData.date, Well.name).yield_per(5000), start=len(archived) + 1
+            ):
+                writer.writerow(row)
+                if written % 5000 == 0:
+                    ctx.progress(written / total, f"{written} rows written")
+        return str(path)
+    finally:
+        db.close()
+
+
+@register_job("reseed", executor="process")
+def reseed(ctx: JobContext) -> None:
+    """Load the sample data file, adding missing wells and rows and resetting existing ones."""
+    from app.db.seed import load_sample_data
+
+    db = SessionLocal()
+    try:
+        load_sample_data(db)
+        db.commit()
+    finally:
+        db.close()
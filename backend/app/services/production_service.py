@@ -0,0 +1,321 @@
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import Date, Float, Integer, bindparam, column, delete, func, select, tuple_, update, values
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.schemas.production import ProductionVolumeUpdate
+from app.services.archive import (
+    ArchivedDateError,
+    archive_cutoff,
+    count_archived,
+    ensure_writable,
+    not_archived,
+    prune_well,
+    read_archived_production,
+    write_cutoff,
+)
+from app.services import cumulative
+from app.services.changelog import DELETE, DELETE_RANGE, UPDATE, production_payload, record_change
+from app.services.sketches import mark_stale
+from app.services.snapshot import fresh_snapshot
+
+
+def bulk_update_volumes(db: Session, items: List[ProductionVolumeUpdate]) -> int:
+    """
+    Update volumes for a list of (well_id, date) keys as one set-based UPDATE.
+
+    On PostgreSQL this is a single UPDATE ... FROM (VALUES ...); other dialects
+    get one parameterised UPDATE executed with executemany. Volumes left as None
+    keep their current value. When a key appears more than once the last item
+    wins. Returns the number of rows matched; raises ArchivedDateError if any
+    item is dated before the archive cutoff.
+    """
+    if not items:
+        return 0
+    ensure_writable(*(item.date for item in items))
+
+    # UPDATE ... FROM applies an arbitrary one of several matching VALUES rows
+    latest = {(item.well_id, item.date): item for item in items}
+    rows = [
+        (item.well_id, item.date, item.oil_volume, item.gas_volume, item.water_volume)
+        for item in latest.values()
+    ]
+    _record_cumulative_deltas(db, rows)
+
+    if db.get_bind().dialect.name == "postgresql":
+        batch = values(
+            column("well_id", Integer),
+            column("date", Date),
+            column("oil_volume", Float),
+            column("gas_volume", Float),
+            column("water_volume", Float),
+            name="batch",
+        ).data(rows)
+        stmt = (
+            update(ProductionData)
+            .where(
+                ProductionData.well_id == batch.c.well_id,
+                ProductionData.date == batch.c.date,
+            )
+            .values(
+                oil_volume=func.coalesce(batch.c.oil_volume, ProductionData.oil_volume),
+                gas_volume=func.coalesce(batch.c.gas_volume, ProductionData.gas_volume),
+                water_volume=func.coalesce(batch.c.water_volume, ProductionData.water_volume),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        matched = db.execute(stmt).rowcount
+        _record_updates(db, rows)
+        return matched
+
+    stmt = (
+        update(ProductionData.__table__)
+        .where(
+            ProductionData.well_id == bindparam("b_well_id"),
+            ProductionData.date == bindparam("b_date"),
+        )
+        .values(
+            oil_volume=func.coalesce(bindparam("b_oil_volume", type_=Float), ProductionData.oil_volume),
+            gas_volume=func.coalesce(bindparam("b_gas_volume", type_=Float), ProductionData.gas_volume),
+            water_volume=func.coalesce(bindparam("b_water_volume", type_=Float), ProductionData.water_volume),
+        )
+    )
+    params = [
+        {
+            "b_well_id": well_id,
+            "b_date": day,
+            "b_oil_volume": oil,
+            "b_gas_volume": gas,
+            "b_water_volume": water,
+        }
+        for well_id, day, oil, gas, water in rows
+    ]
+    matched = db.connection().execute(stmt, params).rowcount
+    _record_updates(db, rows)
+    return matched
+
+
+def _record_cumulative_deltas(db: Session, rows: List[tuple]) -> None:
+    """Shift the cumulative index by the difference between new and current volumes."""
+    latest = {(well_id, day): volumes for well_id, day, *volumes in rows}
+    keys = list(latest)
+    deltas = []
+    for start in range(0, len(keys), 500):
+        current = db.execute(
+            select(
+                ProductionData.well_id,
+                ProductionData.date,
+                ProductionData.oil_volume,
+                ProductionData.gas_volume,
+                ProductionData.water_volume,
+            ).where(tuple_(ProductionData.well_id, ProductionData.date).in_(keys[start:start + 500]))
+        )
+        for well_id, day, *old in current:
+            new = latest[(well_id, day)]
+            deltas.append((well_id, day, *(
+                (value - (previous or 0.0)) if value is not None else 0.0
+                for value, previous in zip(new, old)
+            )))
+    cumulative.record_updates(db, deltas)
+
+
+def _record_updates(db: Session, rows: List[tuple]) -> None:
+    """Log the new state of every row touched by a batch update and flag its sketches."""
+    keys = list({(well_id, day) for well_id, day, *_ in rows})
+    regions = db.scalars(select(Well.region).where(Well.id.in_({well_id for well_id, _ in keys})).distinct()).all()
+    mark_stale(db, regions, min(day for _, day in keys), max(day for _, day in keys))
+    for start in range(0, len(keys), 500):
+        updated = db.scalars(
+            select(ProductionData).where(
+                tuple_(ProductionData.well_id, ProductionData.date).in_(keys[start:start + 500])
+            )
+        )
+        for production in updated:
+            record_change(db, "production", UPDATE, production.id, production_payload(production))
+
+
+def delete_production_range(
+    db: Session,
+    well_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> int:
+    """
+    Delete a well's production rows within an optional date range in one DELETE.
+
+    Raises ArchivedDateError if archived rows of the well fall in the range.
+    """
+    cutoff = write_cutoff()
+    # Rows of a running archive are already written out; any in its range may be
+    archiving = cutoff is not None and cutoff != archive_cutoff()
+    if cutoff is not None and (start_date is None or start_date < cutoff) and (
+        archiving or count_archived([well_id], start_date, end_date)
+    ):
+        raise ArchivedDateError(f"Production before {cutoff.isoformat()} is archived and read-only")
+
+    stmt = delete(ProductionData).where(ProductionData.well_id == well_id)
+    if start_date:
+        stmt = stmt.where(ProductionData.date >= start_date)
+    if end_date:
+        stmt = stmt.where(ProductionData.date <= end_date)
+    deleted = db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+    if deleted:
+        cumulative.rebuild_wells(db, [well_id])
+        mark_stale(db, db.scalars(select(Well.region).where(Well.id == well_id)).all(), start_date, end_date)
+        record_change(db, "production", DELETE_RANGE, data={
+            "well_id": well_id,
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+        })
+    return deleted
+
+
+def delete_well_cascade(db: Session, well_id: int, chunk_size: Optional[int] = None) -> int:
+    """
+    Delete a well and all of its production history, archived rows included.
+
+    Production rows are removed oldest first, about ``chunk_size`` at a time,
+    committing after each chunk so no single transaction holds locks on the whole
+    history. Each chunk is logged as a ``delete_range`` up to its last date, so
+    change-log readers follow the deletion as it commits.
+    Returns the number of production rows deleted.
+    """
+    chunk_size = chunk_size or settings.DELETE_CHUNK_SIZE
+    regions = db.scalars(select(Well.region).where(Well.id == well_id)).all()
+    deleted = 0
+    while True:
+        last_day = db.scalar(
+            select(ProductionData.date)
+            .where(ProductionData.well_id == well_id)
+            .order_by(ProductionData.date)
+            .offset(chunk_size - 1)
+            .limit(1)
+        )
+        stmt = delete(ProductionData).where(ProductionData.well_id == well_id)
+        if last_day is not None:
+            stmt = stmt.where(ProductionData.date <= last_day)
+        count = db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+        if count:
+            record_change(db, "production", DELETE_RANGE, data={
+                "well_id": well_id,
+                "start_date": None,
+                "end_date": last_day.isoformat() if last_day else None,
+            })
+        db.commit()
+        deleted += count
+        # Fewer than chunk_size rows were left, so the last chunk took them all
+        if last_day is None:
+            break
+
+    cumulative.delete_well(db, well_id)
+    db.execute(delete(Well).where(Well.id == well_id).execution_options(synchronize_session=False))
+    mark_stale(db, regions)
+    # The well's deletion implies the deletion of all of its production rows
+    record_change(db, "well", DELETE, well_id)
+    # Before committing, so a deleted well never leaves archived rows for a reused id;
+    # if the commit fails, the well's deletion is retried and the prune is a no-op
+    prune_well(well_id)
+    db.commit()
+    return deleted
+
+
+def production_totals(
+    db: Session,
+    region: Optional[str] = None,
+    well_name: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[str, float]:
+    """
+    Sum volumes and count rows matching the production filters, archived history included.
+    """
+    query = db.query(
+        func.coalesce(func.sum(ProductionData.oil_volume), 0.0),
+        func.coalesce(func.sum(ProductionData.gas_volume), 0.0),
+        func.coalesce(func.sum(ProductionData.water_volume), 0.0),
+        func.count(ProductionData.id),
+    ).join(Well, ProductionData.well_id == Well.id).filter(not_archived())
+    if region:
+        query = query.filter(Well.region == region)
+    if well_name:
+        query = query.filter(Well.name == well_name)
+    if start_date:
+        query = query.filter(ProductionData.date >= start_date)
+    if end_date:
+        query = query.filter(ProductionData.date <= end_date)
+    oil, gas, water, rows = query.one()
+    totals = {"oil_volume": oil, "gas_volume": gas, "water_volume": water, "rows": rows}
+
+    for row in read_archived_production(
+        db, region=region, well_name=well_name, start_date=start_date, end_date=end_date,
+        columns=["well_id", "oil_volume", "gas_volume", "water_volume"],
+    ):
+        for column in ("oil_volume", "gas_volume", "water_volume"):
+            totals[column] += row[column] or 0.0
+        totals["rows"] += 1
+    return totals
+
+
+def query_production_page(
+    db: Session,
+    region: Optional[str] = None,
+    well_name: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100,
+    use_snapshot: bool = True,
+) -> List[Dict]:
+    """
+    One page of production rows with well name and region.
+
+    Rows from the database come first, ordered by date, followed by archived
+    history once they run out; the archive is only read when the page reaches
+    past the database rows. With SNAPSHOT_READS enabled (and ``use_snapshot``),
+    rows are served from the shared snapshot instead while it is up to date.
+    """
+    snapshot = fresh_snapshot(db) if settings.SNAPSHOT_READS and use_snapshot else None
+    if snapshot is not None:
+        return snapshot.read_production(region, well_name, start_date, end_date, skip, limit)
+    if limit <= 0:
+        return []
+
+    query = (
+        db.query(Well.name, ProductionData.date, ProductionData.oil_volume, Well.region)
+        .join(Well, ProductionData.well_id == Well.id)
+        .filter(not_archived())
+    )
+    if region:
+        query = query.filter(Well.region == region)
+    if well_name:
+        query = query.filter(Well.name == well_name)
+    if start_date:
+        query = query.filter(ProductionData.date >= start_date)
+    if end_date:
+        query = query.filter(ProductionData.date <= end_date)
+
+    rows = [
+        {"well_name": name, "date": day, "oil_volume": oil_volume, "region": well_region}
+        for name, day, oil_volume, well_region in query.order_by(ProductionData.date, ProductionData.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    ]
+    if len(rows) == limit:
+        return rows
+
+    # A short page ends the database rows; an empty one needs their count to place the archive offset
+    archive_skip = 0 if rows else max(skip - query.count(), 0)
+    archived = read_archived_production(
+        db, region=region, well_name=well_name, start_date=start_date, end_date=end_date,
+        offset=archive_skip, limit=limit - len(rows),
+    )
+    rows.extend(
+        {"well_name": row["well_name"], "date": row["date"], "oil_volume": row["oil_volume"], "region": row["region"]}
+        for row in archived
+    )
+    return rows
@@ -0,0 +1,68 @@
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers arriving with the same key
+    while it is in flight block and receive the same result (or exception). Nothing
+    is cached once the call completes. With ``share=False`` the caller runs its own
+    call and joins none in flight, for reads that must not start before the caller's
+    own writes.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], share: bool = True) -> Any:
+        if not share:
+            with self._lock:
+                self.executed += 1
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"in_flight": in_flight, "executed": self.executed, "shared": self.shared}
+
+
+# Shared by the read endpoints; results are serialized JSON bytes
+read_coalescer = SingleFlight()
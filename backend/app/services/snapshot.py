@@ -0,0 +1,279 @@
+"""
+Shared, memory-mapped snapshot of wells and production data.
+
+One writer (the ``build_snapshot`` job) serialises the data into a single file
+under ``DATA_DIR/SNAPSHOT_DIR``; every worker on the host maps it read-only, so
+the operating system keeps one copy in the page cache regardless of the number
+of workers.
+
+File layout (little-endian)::
+
+    header      64 bytes   magic, version, row count, well count, dictionary offset/length,
+                           change-log version, archive cutoff (days since 1970-01-01, -1 if none)
+    oil_volume  float64[rows]
+    gas_volume  float64[rows]
+    water       float64[rows]
+    well_index  int32[rows]    index into the well dictionary
+    day         int32[rows]    days since 1970-01-01, rows sorted by (day, row id)
+    dictionary  JSON           [{id, name, region, latitude, longitude}, ...]
+
+A new version is written to its own file and published by atomically replacing
+the ``CURRENT`` pointer; readers notice the change and remap without restarting.
+The header records the change-log version read before the data, so readers can
+tell when a write has made the snapshot stale and fall back to the database, and
+the archive cutoff the data was split at, so a published cutoff makes it stale too;
+a scheduled ``build_snapshot`` job replaces stale snapshots every
+SNAPSHOT_REBUILD_SECONDS.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.services.archive import archive_cutoff, scan_archive
+from app.services.changelog import latest_version
+from app.services.jobs import JobContext, register_job, schedule_job
+
+MAGIC = b"OGSNAP03"
+HEADER = struct.Struct("<8sQQQQQQq")
+NO_CUTOFF = -1
+POINTER_FILE = "CURRENT"
+EPOCH = date(1970, 1, 1)
+VOLUME_COLUMNS = ("oil_volume", "gas_volume", "water_volume")
+
+
+def snapshot_dir() -> Path:
+    return Path(settings.DATA_DIR) / settings.SNAPSHOT_DIR
+
+
+def _fsync_write(path: Path, chunks) -> None:
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def build_snapshot(db: Session, keep: int = 2) -> Path:
+    """
+    Write a new snapshot version from the database and archive and publish it.
+    """
+    # Read first: any change committed while the data is read makes the snapshot look stale, never fresh
+    change_version = latest_version(db)
+    cutoff = archive_cutoff()
+    wells = db.query(Well).order_by(Well.id).all()
+    dictionary = [
+        {
+            "id": well.id,
+            "name": well.name,
+            "region": well.region,
+            "latitude": well.latitude,
+            "longitude": well.longitude,
+        }
+        for well in wells
+    ]
+    index_of = {well.id: idx for idx, well in enumerate(wells)}
+
+    # Both sides split at the cutoff read once, in case an archive run publishes a new one meanwhile
+    hot = db.query(
+        ProductionData.id,
+        ProductionData.well_id,
+        ProductionData.date,
+        ProductionData.oil_volume,
+        ProductionData.gas_volume,
+        ProductionData.water_volume,
+    )
+    if cutoff is not None:
+        hot = hot.filter(ProductionData.date >= cutoff)
+    hot = pd.DataFrame(hot.all(), columns=["id", "well_id", "date", *VOLUME_COLUMNS])
+    if cutoff is not None:
+        cold = scan_archive(end_date=cutoff - timedelta(days=1), columns=["id", "well_id", "date", *VOLUME_COLUMNS])
+        if not cold.empty:
+            hot = pd.concat([cold, hot], ignore_index=True)
+    frame = hot[hot["well_id"].isin(list(index_of))]
+
+    well_index = frame["well_id"].map(index_of).to_numpy(dtype="<i4")
+    day = (pd.to_datetime(frame["date"]).to_numpy().astype("datetime64[D]").astype("<i4"))
+    # Ties on a day in the database's order, by row id
+    order = np.lexsort((frame["id"].to_numpy(dtype="<i8"), day))
+    columns = [
+        frame[column].to_numpy(dtype="<f8", na_value=np.nan)[order] for column in VOLUME_COLUMNS
+    ] + [well_index[order], day[order]]
+
+    payload = json.dumps(dictionary).encode()
+    rows = len(frame)
+    dict_offset = HEADER.size + sum(column.nbytes for column in columns)
+    version = time.time_ns()
+    cutoff_day = (cutoff - EPOCH).days if cutoff else NO_CUTOFF
+    header = HEADER.pack(MAGIC, version, rows, len(dictionary), dict_offset, len(payload), change_version, cutoff_day)
+
+    directory = snapshot_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"production-{version}.snap"
+    tmp = directory / f".{name}.tmp"
+    _fsync_write(tmp, [header, *(column.tobytes() for column in columns), payload])
+    os.replace(tmp, directory / name)
+
+    pointer_tmp = directory / f".{POINTER_FILE}.tmp"
+    _fsync_write(pointer_tmp, [name.encode()])
+    os.replace(pointer_tmp, directory / POINTER_FILE)
+    logger.info(f"Published snapshot {name} ({rows} rows, {len(dictionary)} wells)")
+
+    # Readers that still map an older version keep their pages after unlink
+    versions = sorted(directory.glob("production-*.snap"))
+    for stale in versions[:-keep]:
+        stale.unlink()
+    return directory / name
+
+
+class Snapshot:
+    """
+    Read-only view over one mapped snapshot file. Column arrays are zero-copy.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic, self.version, rows, wells, dict_offset, dict_length, self.change_version, cutoff_day,
+        ) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a production snapshot")
+        self.cutoff: Optional[date] = None if cutoff_day == NO_CUTOFF else EPOCH + timedelta(days=cutoff_day)
+        self.path = path
+        self.rows = rows
+
+        offset = HEADER.size
+        arrays = {}
+        for column, dtype in (
+            ("oil_volume", "<f8"), ("gas_volume", "<f8"), ("water_volume", "<f8"),
+            ("well_index", "<i4"), ("day", "<i4"),
+        ):
+            arrays[column] = np.frombuffer(self._map, dtype=dtype, count=rows, offset=offset)
+            offset += arrays[column].nbytes
+        self.columns = arrays
+
+        self.wells: List[Dict] = json.loads(self._map[dict_offset:dict_offset + dict_length])
+        self._well_by_name = {well["name"]: idx for idx, well in enumerate(self.wells)}
+        self._regions = np.array([well["region"] or "" for well in self.wells], dtype=object)
+
+    def read_wells(self, skip: int = 0, limit: int = 100) -> List[Dict]:
+        return self.wells[skip:skip + limit]
+
+    def read_production(
+        self,
+        region: Optional[str] = None,
+        well_name: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Dict]:
+        """
+        Filter rows like ``GET /production``: rows from the archive cutoff on, then
+        archived history, each ordered by date and row id.
+        """
+        day = self.columns["day"]
+        lo = np.searchsorted(day, (start_date - EPOCH).days, "left") if start_date else 0
+        hi = np.searchsorted(day, (end_date - EPOCH).days, "right") if end_date else self.rows
+        cutoff = self.cutoff
+        split = min(max(np.searchsorted(day, (cutoff - EPOCH).days, "left"), lo), hi) if cutoff else lo
+        positions = np.concatenate([np.arange(split, hi), np.arange(lo, split)])
+
+        well_index = self.columns["well_index"][positions]
+        mask = np.ones(len(positions), dtype=bool)
+        if well_name is not None:
+            mask &= well_index == self._well_by_name.get(well_name, -1)
+        if region is not None:
+            mask &= np.isin(well_index, np.flatnonzero(self._regions == region))
+        positions = positions[mask][skip:skip + limit]
+
+        oil = self.columns["oil_volume"]
+        result = []
+        for position in positions:
+            well = self.wells[self.columns["well_index"][position]]
+            volume = float(oil[position])
+            result.append({
+                "well_name": well["name"],
+                "date": EPOCH + timedelta(days=int(day[position])),
+                "oil_volume": None if np.isnan(volume) else volume,
+                "region": well["region"],
+            })
+        return result
+
+
+class SnapshotReader:
+    """
+    Per-process handle on the current snapshot, remapped when a new version is published.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._snapshot: Optional[Snapshot] = None
+        self._pointer: Optional[str] = None
+        self._checked_at = 0.0
+        self.cutoff: Optional[date] = None
+
+    def current(self) -> Optional[Snapshot]:
+        now = time.monotonic()
+        if now - self._checked_at < settings.SNAPSHOT_CHECK_INTERVAL:
+            return self._snapshot
+        with self._lock:
+            self._checked_at = now
+            # Re-read with the pointer, not on every read
+            self.cutoff = archive_cutoff()
+            pointer = snapshot_dir() / POINTER_FILE
+            try:
+                name = pointer.read_text().strip()
+            except FileNotFoundError:
+                return self._snapshot
+            if name != self._pointer:
+                try:
+                    self._snapshot = Snapshot(snapshot_dir() / name)
+                    self._pointer = name
+                    logger.info(f"Mapped snapshot {name} ({self._snapshot.rows} rows)")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not map snapshot {name}: {str(e)}")
+            return self._snapshot
+
+
+snapshot_reader = SnapshotReader()
+
+
+def fresh_snapshot(db: Session) -> Optional[Snapshot]:
+    """The current snapshot if no change was logged or cutoff published after it was built, else None."""
+    snapshot = snapshot_reader.current()
+    if snapshot is None or snapshot.cutoff != snapshot_reader.cutoff or snapshot.change_version < latest_version(db):
+        return None
+    return snapshot
+
+
+def snapshot_is_stale(db: Session) -> bool:
+    return settings.SNAPSHOT_READS and fresh_snapshot(db) is None
+
+
+@register_job("build_snapshot")
+def build_snapshot_job(ctx: JobContext) -> None:
+    """Write and publish a new shared snapshot."""
+    db = SessionLocal()
+    try:
+        build_snapshot(db)
+    finally:
+        db.close()
+
+
+schedule_job("build_snapshot", settings.SNAPSHOT_REBUILD_SECONDS, when=snapshot_is_stale)
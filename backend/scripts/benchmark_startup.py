@@ -0,0 +1,71 @@
+"""
+Measure API worker cold-start time.
+
+Starts uvicorn, polls /health/live and /health/ready and prints how long each
+took to answer, for one or more runs:
+
+    python scripts/benchmark_startup.py --mode lazy --runs 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for(client: httpx.Client, url: str, started: float, timeout: float) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def run_once(mode: str, port: int, timeout: float) -> dict:
+    env = dict(os.environ, STARTUP_MODE=mode)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        with httpx.Client(timeout=1.0) as client:
+            live = wait_for(client, f"{base}/health/live", started, timeout)
+            ready = wait_for(client, f"{base}/health/ready", started, timeout)
+            reported = client.get(f"{base}/health/ready").json().get("startup_seconds")
+        return {"live": live, "ready": ready, "reported": reported}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", default=os.environ.get("STARTUP_MODE", "lazy"), choices=["full", "lazy"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    results = [run_once(args.mode, args.port, args.timeout) for _ in range(args.runs)]
+    print(f"startup benchmark: STARTUP_MODE={args.mode}, runs={args.runs}")
+    for key, label in (("live", "time to live"), ("ready", "time to ready")):
+        values = [result[key] for result in results]
+        print(f"  {label:<15} median {statistics.median(values):.3f}s  max {max(values):.3f}s")
+    reported = [result["reported"] for result in results if result["reported"] is not None]
+    if reported:
+        print(f"  {'worker startup':<15} median {statistics.median(reported):.3f}s  (reported by /health/ready)")
+
+
+if __name__ == "__main__":
+    main()
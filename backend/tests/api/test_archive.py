@@ -0,0 +1,140 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.production import ProductionData
+from app.services import archive
+from app.services.archive import archive_cutoff, archive_production
+from app.services.production_service import production_totals
+
+CUTOFF = date(2025, 4, 21)
+
+
+@pytest.fixture
+def archived(client, db):
+    """Archive the sample rows dated before CUTOFF (the first three of seven days)."""
+    assert archive_production(db, CUTOFF) == 15
+    return client
+
+
+def _page(client, **params):
+    response = client.get("/api/v1/production/", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_archive_moves_rows_out_of_database(archived, db):
+    assert db.query(ProductionData).filter(ProductionData.date < CUTOFF).count() == 0
+    assert db.query(ProductionData).count() == 20
+
+
+def test_archive_keeps_rows_it_did_not_export(client, db):
+    # A row whose well is gone is not exported, so it must not be deleted either
+    db.execute(insert(ProductionData).values(well_id=999, date=date(2025, 4, 18), oil_volume=1.0))
+    db.commit()
+    assert archive_production(db, CUTOFF) == 15
+    assert db.query(ProductionData).filter(ProductionData.well_id == 999).count() == 1
+
+
+def test_database_rows_come_before_archived_history(archived):
+    rows = _page(archived, limit=100)
+    assert len(rows) == 35
+    days = [date.fromisoformat(row["date"]) for row in rows]
+    assert all(day >= CUTOFF for day in days[:20]) and days[:20] == sorted(days[:20])
+    assert all(day < CUTOFF for day in days[20:]) and days[20:] == sorted(days[20:])
+
+
+def test_pages_concatenate_to_full_result(archived):
+    full = _page(archived, limit=100)
+    paged = []
+    for skip in range(0, 40, 6):
+        paged += _page(archived, skip=skip, limit=6)
+    assert paged == full
+    assert _page(archived, skip=20, limit=5) == full[20:25]
+    assert _page(archived, skip=33, limit=5) == full[33:]
+
+
+def test_filters_apply_to_archived_rows(archived):
+    rows = _page(archived, well_name="Well-2", start_date="2025-04-19", end_date="2025-04-22")
+    assert [row["date"] for row in rows] == ["2025-04-21", "2025-04-22", "2025-04-19", "2025-04-20"]
+
+
+def test_region_filter_uses_current_region(archived):
+    response = archived.put("/api/v1/wells/2", json={"region": "Sharjah"})
+    assert response.status_code == 200
+
+    moved = _page(archived, region="Sharjah")
+    assert len(moved) == 7
+    assert {row["region"] for row in moved} == {"Sharjah"}
+    assert _page(archived, region="Dubai") == []
+
+
+def test_writes_to_archived_dates_are_rejected(archived):
+    response = archived.post("/api/v1/production/", json={"well_id": 1, "date": "2025-04-19", "oil_volume": 1.0})
+    assert response.status_code == 409
+
+    response = archived.put("/api/v1/production/batch", json={"items": [
+        {"well_id": 1, "date": "2025-04-19", "oil_volume": 1.0},
+        {"well_id": 1, "date": "2025-04-22", "oil_volume": 1.0},
+    ]})
+    assert response.status_code == 409
+
+    response = archived.delete("/api/v1/production/batch", params={"well_id": 1, "end_date": "2025-04-22"})
+    assert response.status_code == 409
+
+    response = archived.delete("/api/v1/production/batch", params={"well_id": 1, "start_date": "2025-04-22"})
+    assert response.status_code == 200
+    assert response.json() == {"rows_affected": 3}
+
+
+def test_rows_are_read_once_while_a_run_is_interrupted(client, db, monkeypatch):
+    expected = production_totals(db)
+
+    # Stopped after publishing the cutoff, before deleting the moved rows
+    def interrupted(db, files):
+        raise RuntimeError("interrupted")
+    monkeypatch.setattr(archive, "_delete_archived", interrupted)
+    with pytest.raises(RuntimeError):
+        archive_production(db, CUTOFF)
+    assert db.query(ProductionData).filter(ProductionData.date < CUTOFF).count() == 15
+    assert production_totals(db) == expected
+    assert len(_page(client, limit=100)) == 35
+
+    monkeypatch.undo()
+    assert archive_production(db, CUTOFF) == 0
+    assert db.query(ProductionData).filter(ProductionData.date < CUTOFF).count() == 0
+    assert production_totals(db) == expected
+
+
+def test_files_of_an_unpublished_run_stay_hidden(client, db, monkeypatch):
+    expected = production_totals(db)
+
+    # Stopped after writing the files, before publishing the cutoff
+    write_json = archive._write_json_atomic
+    def interrupted(path, data):
+        if path.name == archive.MANIFEST_FILE:
+            raise RuntimeError("interrupted")
+        write_json(path, data)
+    monkeypatch.setattr(archive, "_write_json_atomic", interrupted)
+    with pytest.raises(RuntimeError):
+        archive_production(db, CUTOFF)
+    assert archive_cutoff() is None
+    assert production_totals(db) == expected
+    # The dates being archived are read-only already
+    response = client.post("/api/v1/production/", json={"well_id": 1, "date": "2025-04-15", "oil_volume": 1.0})
+    assert response.status_code == 409
+
+    monkeypatch.undo()
+    assert archive_production(db, CUTOFF) == 15
+    assert production_totals(db) == expected
+    assert len(_page(client, limit=100)) == 35
+
+
+def test_deleting_a_well_prunes_its_archived_rows(archived, db):
+    assert archived.delete("/api/v1/wells/2").status_code == 200
+    table = archive._dataset().to_table()
+    assert table.num_rows == 12
+    assert 2 not in table["well_id"].to_pylist()
+    # Well-2 was the only Dubai well, so its partition files are gone
+    assert not list(archive.archive_root().glob("region=Dubai/*/*/*.parquet"))
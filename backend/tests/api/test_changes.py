@@ -0,0 +1,90 @@
+from app.db.session import SessionLocal
+from app.models.change_log import ChangeLog
+from app.models.well import Well
+from app.services.changelog import DELETE, DELETE_RANGE, INSERT, compact_changes, latest_version, record_change
+from app.services.jobs import _schedules
+from app.services.production_service import delete_well_cascade
+
+
+def _changes(client, since):
+    response = client.get("/api/v1/changes/", params={"since": since})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_versions_follow_commit_order(client, db):
+    since = latest_version(db)
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        # The first transaction logs its change before the second, but commits after it
+        record_change(first, "well", INSERT, 101, {"name": "first"})
+        first.flush()
+        record_change(second, "well", INSERT, 102, {"name": "second"})
+        second.commit()
+        first.commit()
+    finally:
+        first.close()
+        second.close()
+
+    changes = _changes(client, since)["changes"]
+    assert [change["entity_id"] for change in changes] == [102, 101]
+
+
+def test_changes_are_readable_as_soon_as_committed(client, db):
+    since = latest_version(db)
+    record_change(db, "well", INSERT, 101, {"name": "new"})
+    db.commit()
+    body = _changes(client, since)
+    assert [change["entity_id"] for change in body["changes"]] == [101]
+    assert body["version"] > since
+
+
+def test_rolled_back_changes_are_discarded(client, db):
+    since = latest_version(db)
+    record_change(db, "well", INSERT, 101, {"name": "discarded"})
+    db.rollback()
+    record_change(db, "well", INSERT, 102, {"name": "kept"})
+    db.commit()
+    assert [change["entity_id"] for change in _changes(client, since)["changes"]] == [102]
+
+
+def test_well_cascade_logs_each_committed_chunk(client, db):
+    since = latest_version(db)
+    well_id = db.query(Well.id).filter(Well.name == "Well-1").scalar()
+    assert delete_well_cascade(db, well_id, chunk_size=3) == 7
+
+    changes = _changes(client, since)["changes"]
+    assert [(change["op"], (change["data"] or {}).get("end_date")) for change in changes] == [
+        ("delete_range", "2025-04-20"),
+        ("delete_range", "2025-04-23"),
+        ("delete_range", None),
+        ("delete", None),
+    ]
+
+
+def test_compaction_drops_superseded_range_deletes(db):
+    since = latest_version(db)
+    for well_id, start_date, end_date in (
+        (1, "2025-04-18", "2025-04-20"),  # covered by the next range
+        (1, None, "2025-04-22"),
+        (2, "2025-04-18", "2025-04-20"),  # nothing newer covers it
+        (3, "2025-04-18", None),          # its well is deleted later
+    ):
+        record_change(db, "production", DELETE_RANGE, data={
+            "well_id": well_id, "start_date": start_date, "end_date": end_date,
+        })
+    record_change(db, "well", DELETE, 3)
+    db.commit()
+
+    compact_changes(db, retention_days=0)
+    kept = db.query(ChangeLog).filter(ChangeLog.version > since).order_by(ChangeLog.version).all()
+    assert [(entry.op, (entry.data or {}).get("well_id")) for entry in kept] == [
+        (DELETE_RANGE, 1),
+        (DELETE_RANGE, 2),
+        (DELETE, None),
+    ]
+    assert kept[0].data["start_date"] is None
+
+
+def test_compaction_is_scheduled():
+    assert any(schedule.job_type == "compact_changes" for schedule in _schedules)
@@ -0,0 +1,95 @@
+from datetime import date
+
+from app.db.init_db import init_db
+from app.models.cumulative import ProductionCumulative
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.services.cumulative import ensure_cumulative, range_totals, rebuild_cumulative
+from app.services.ingest import upsert_production, upsert_wells
+
+
+def _wells(db):
+    return {well.name: well for well in db.query(Well)}
+
+
+def _cumulative(client, **params):
+    response = client.get("/api/v1/production/cumulative", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _oil(db, well_id, start_date=None, end_date=None):
+    query = db.query(ProductionData.oil_volume).filter(ProductionData.well_id == well_id)
+    if start_date:
+        query = query.filter(ProductionData.date >= start_date)
+    if end_date:
+        query = query.filter(ProductionData.date <= end_date)
+    return sum(oil or 0.0 for oil, in query)
+
+
+def test_range_totals_match_production_rows(client, db):
+    well = _wells(db)["Well-1"]
+    totals = _cumulative(client, well_name="Well-1", start_date="2025-04-20", end_date="2025-04-22")
+    assert totals["oil_volume"] == _oil(db, well.id, date(2025, 4, 20), date(2025, 4, 22))
+
+    as_of = _cumulative(client, well_name="Well-1", end_date="2025-04-22")
+    assert as_of["oil_volume"] == _oil(db, well.id, end_date=date(2025, 4, 22))
+
+
+def test_creating_an_existing_well_and_date_conflicts(client, db):
+    well = _wells(db)["Well-1"]
+    response = client.post("/api/v1/production/", json={
+        "well_id": well.id, "date": "2025-04-18", "oil_volume": 1.0,
+    })
+    assert response.status_code == 409
+    assert db.query(ProductionData).filter(ProductionData.well_id == well.id).count() == 7
+
+
+def test_updating_onto_an_existing_key_conflicts(client, db):
+    well = _wells(db)["Well-1"]
+    production = db.query(ProductionData).filter(
+        ProductionData.well_id == well.id, ProductionData.date == date(2025, 4, 18)
+    ).one()
+    response = client.put(f"/api/v1/production/{production.id}", json={"date": "2025-04-19"})
+    assert response.status_code == 409
+
+    response = client.put(f"/api/v1/production/{production.id}", json={"date": "2025-04-25"})
+    assert response.status_code == 200, response.text
+    assert _cumulative(client, well_name="Well-1", start_date="2025-04-25")["oil_volume"] == production.oil_volume
+    assert _cumulative(client, well_name="Well-1", end_date="2025-04-18")["oil_volume"] == 0.0
+
+
+def test_ingested_rows_update_totals_incrementally(db):
+    wells = _wells(db)
+    # Two rows appended after Well-1's history and one filling a gap in Well-3's
+    db.query(ProductionData).filter(
+        ProductionData.well_id == wells["Well-3"].id, ProductionData.date == date(2025, 4, 20)
+    ).delete()
+    rebuild_cumulative(db)
+    rows = [
+        {"well_name": name, "latitude": wells[name].latitude, "longitude": wells[name].longitude,
+         "region": wells[name].region, "date": day, "oil_volume": oil}
+        for name, day, oil in (
+            ("Well-1", date(2025, 4, 26), 30.0),
+            ("Well-1", date(2025, 4, 25), 20.0),
+            ("Well-3", date(2025, 4, 20), 15.0),
+        )
+    ]
+    # A new well starts its entries from zero
+    rows.append({"well_name": "Well-9", "latitude": 24.1, "longitude": 54.1, "region": "Dubai",
+                 "date": date(2025, 4, 25), "oil_volume": 5.0})
+    upsert_production(db, rows, upsert_wells(db, rows))
+    db.commit()
+
+    incremental = [range_totals(db, start_date=date(2025, 4, 19)), range_totals(db, end_date=date(2025, 4, 25))]
+    rebuild_cumulative(db)
+    assert incremental == [range_totals(db, start_date=date(2025, 4, 19)), range_totals(db, end_date=date(2025, 4, 25))]
+
+
+def test_empty_index_is_built_at_startup(db):
+    expected = range_totals(db)
+    db.query(ProductionCumulative).delete()
+    db.commit()
+    init_db(db)
+    assert range_totals(db) == expected
+    assert not ensure_cumulative(db)
@@ -0,0 +1,22 @@
+from app.core.config import settings
+from app.db.session import get_engine
+from app.services.changelog import latest_version
+from app.services.dashboard import _worker_engine
+
+
+def test_bundle_tracks_the_change_log_version(client, db):
+    first = client.get("/api/v1/dashboard/", params={"region": "Dubai"}).json()
+    assert first["version"] == latest_version(db)
+    assert sum(day["oil_volume"] for day in first["series"]) > 0
+
+    client.put("/api/v1/production/batch", json={"items": [{"well_id": 2, "date": "2025-04-18", "oil_volume": 0.0}]})
+    second = client.get("/api/v1/dashboard/", params={"region": "Dubai"}).json()
+    assert second["version"] > first["version"]
+    assert second["series"][0]["oil_volume"] == 0.0
+
+
+def test_workers_use_their_own_bounded_pool():
+    engine = _worker_engine(get_engine())
+    assert engine is not get_engine()
+    assert engine is _worker_engine(get_engine())
+    assert engine.pool.size() == settings.DASHBOARD_WORKERS
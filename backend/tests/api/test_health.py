@@ -0,0 +1,53 @@
+import time
+
+from app import main
+from app.core.config import settings
+
+
+def _wait_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/health/ready")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.02)
+    raise AssertionError("worker did not become ready")
+
+
+def test_ready_after_warm_up(client):
+    assert client.get("/health/live").json() == {"status": "alive"}
+    body = _wait_ready(client).json()
+    assert body["status"] == "ready"
+    assert body["startup_seconds"] is not None
+
+
+def test_failed_warm_up_is_retried_before_ready(monkeypatch):
+    real_get_engine = main.get_engine
+    attempts = []
+
+    def flaky_get_engine():
+        attempts.append(main.app.state.ready)
+        if len(attempts) == 1:
+            raise ConnectionError("database is starting up")
+        return real_get_engine()
+
+    monkeypatch.setattr(settings, "WARMUP_ON_STARTUP", True)
+    monkeypatch.setattr(main, "WARMUP_RETRY_SECONDS", 0.0)
+    monkeypatch.setattr(main, "get_engine", flaky_get_engine)
+    monkeypatch.setattr(main.app.state, "ready", False)
+
+    main._warm_up()
+    assert attempts == [False, False]
+    assert main.app.state.ready is True
+
+
+def test_readiness_hides_database_errors(client, monkeypatch):
+    _wait_ready(client)
+
+    def broken_engine():
+        raise ConnectionError("password authentication failed for user secret")
+
+    monkeypatch.setattr(main, "get_engine", broken_engine)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "unavailable", "detail": "Database unavailable"}
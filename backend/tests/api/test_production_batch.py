@@ -0,0 +1,69 @@
+from datetime import date
+
+from app.models.production import ProductionData
+from app.models.well import Well
+
+
+def _volumes(db, well_id, day):
+    db.expire_all()
+    row = db.query(ProductionData).filter(ProductionData.well_id == well_id, ProductionData.date == day).one()
+    return row.oil_volume, row.gas_volume, row.water_volume
+
+
+def test_batch_update_sets_given_volumes_only(client, db):
+    before = _volumes(db, 1, date(2025, 4, 18))
+    response = client.put("/api/v1/production/batch", json={"items": [
+        {"well_id": 1, "date": "2025-04-18", "oil_volume": 1.5},
+        {"well_id": 2, "date": "2025-04-18", "gas_volume": 3.0, "water_volume": 4.0},
+        {"well_id": 1, "date": "1999-01-01", "oil_volume": 9.0},
+    ]})
+    assert response.status_code == 200
+    assert response.json() == {"rows_affected": 2}
+    assert _volumes(db, 1, date(2025, 4, 18)) == (1.5, before[1], before[2])
+    assert _volumes(db, 2, date(2025, 4, 18))[1:] == (3.0, 4.0)
+
+
+def test_batch_update_duplicate_keys_last_wins(client, db):
+    response = client.put("/api/v1/production/batch", json={"items": [
+        {"well_id": 1, "date": "2025-04-19", "oil_volume": 10.0},
+        {"well_id": 1, "date": "2025-04-19", "oil_volume": 20.0},
+    ]})
+    assert response.status_code == 200
+    assert response.json() == {"rows_affected": 1}
+    assert _volumes(db, 1, date(2025, 4, 19))[0] == 20.0
+
+
+def test_batch_update_rejects_empty_batch(client):
+    assert client.put("/api/v1/production/batch", json={"items": []}).status_code == 422
+
+
+def test_batch_delete_range(client, db):
+    response = client.delete(
+        "/api/v1/production/batch", params={"well_id": 1, "start_date": "2025-04-19", "end_date": "2025-04-21"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"rows_affected": 3}
+    remaining = sorted(day for (day,) in db.query(ProductionData.date).filter(ProductionData.well_id == 1))
+    assert date(2025, 4, 19) not in remaining and date(2025, 4, 21) not in remaining
+    assert date(2025, 4, 18) in remaining and date(2025, 4, 22) in remaining
+
+
+def test_batch_delete_rejects_inverted_range(client):
+    response = client.delete(
+        "/api/v1/production/batch", params={"well_id": 1, "start_date": "2025-04-21", "end_date": "2025-04-19"}
+    )
+    assert response.status_code == 422
+
+
+def test_delete_well_cascades_in_chunks(client, db, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "DELETE_CHUNK_SIZE", 2)
+    history = db.query(ProductionData).filter(ProductionData.well_id == 2).count()
+
+    response = client.delete("/api/v1/wells/2")
+    assert response.status_code == 200
+    assert response.json() == {"ok": True, "production_rows_deleted": history}
+    db.expire_all()
+    assert db.get(Well, 2) is None
+    assert db.query(ProductionData).filter(ProductionData.well_id == 2).count() == 0
@@ -0,0 +1,81 @@
+import time
+from datetime import date
+
+import pytest
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.models.job import Job
+from app.models.production import ProductionData
+from app.services import snapshot
+from app.services.archive import archive_production
+from app.services.jobs import job_runner
+from app.services.production_service import query_production_page
+
+
+@pytest.fixture
+def snapshot_reads(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_CHECK_INTERVAL", 0.0)
+    monkeypatch.setattr(snapshot, "snapshot_reader", snapshot.SnapshotReader())
+    # Built before enabling reads so the heartbeat's schedule pass never sees a missing snapshot
+    snapshot.build_snapshot(db)
+    monkeypatch.setattr(settings, "SNAPSHOT_READS", True)
+    return client
+
+
+def _dates(client, **params):
+    return [row["date"] for row in client.get("/api/v1/production/", params={"limit": 100, **params}).json()]
+
+
+def test_fresh_snapshot_serves_reads(snapshot_reads, db):
+    # Written behind the change log's back, so only a database read would see it
+    db.execute(insert(ProductionData).values(well_id=1, date=date(2025, 5, 1), oil_volume=1.0))
+    db.commit()
+    assert snapshot.fresh_snapshot(db) is not None
+    assert "2025-05-01" not in _dates(snapshot_reads, well_name="Well-1")
+
+
+def test_logged_write_falls_back_to_database(snapshot_reads, db):
+    response = snapshot_reads.post("/api/v1/production/", json={"well_id": 1, "date": "2025-05-01", "oil_volume": 1.0})
+    assert response.status_code == 201
+    assert snapshot.fresh_snapshot(db) is None
+    assert "2025-05-01" in _dates(snapshot_reads, well_name="Well-1")
+
+
+def test_stale_snapshot_is_rebuilt_on_schedule(snapshot_reads, db):
+    assert job_runner.run_schedules() == []
+    snapshot_reads.post("/api/v1/production/", json={"well_id": 1, "date": "2025-05-01", "oil_volume": 1.0})
+
+    # The heartbeat thread may run the schedule first; either way one job is submitted
+    job_runner.run_schedules()
+    job_runner.run_schedules()
+    submitted = db.query(Job).filter(Job.job_type == "build_snapshot").all()
+    assert len(submitted) == 1
+
+    deadline = time.monotonic() + 10
+    while db.get(Job, submitted[0].id).status != "succeeded" and time.monotonic() < deadline:
+        db.expire_all()
+        time.sleep(0.05)
+    assert snapshot.fresh_snapshot(db) is not None
+    assert "2025-05-01" in _dates(snapshot_reads, well_name="Well-1")
+
+
+def test_snapshot_pages_match_database_pages(snapshot_reads, db):
+    # Same day, inserted in the opposite order of the wells
+    for well_id in (5, 1):
+        db.execute(insert(ProductionData).values(well_id=well_id, date=date(2025, 5, 1), oil_volume=1.0))
+    db.commit()
+    current = snapshot.Snapshot(snapshot.build_snapshot(db))
+    for skip in (0, 30, 35):
+        expected = query_production_page(db, skip=skip, limit=5, use_snapshot=False)
+        assert current.read_production(skip=skip, limit=5) == expected
+
+
+def test_published_cutoff_makes_snapshot_stale(snapshot_reads, db):
+    assert archive_production(db, date(2025, 4, 21)) == 15
+    assert snapshot.fresh_snapshot(db) is None
+
+    snapshot.build_snapshot(db)
+    current = snapshot.fresh_snapshot(db)
+    assert current is not None and current.cutoff == date(2025, 4, 21)
+    assert current.read_production(limit=100) == query_production_page(db, limit=100, use_snapshot=False)
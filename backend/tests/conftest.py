@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import wait
+from pathlib import Path
+
+import pytest
+
+# Settings are read once at import time, so point them at a scratch SQLite
+# database and data directory before anything from the app is imported.
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+_TMP_DIR = Path(tempfile.mkdtemp(prefix="production-tests-"))
+os.environ.update(
+    POSTGRES_SERVER="localhost",
+    POSTGRES_USER="test",
+    POSTGRES_PASSWORD="test",
+    POSTGRES_DB="test",
+    POSTGRES_PORT="5432",
+    SQLALCHEMY_DATABASE_URI=f"sqlite:///{_TMP_DIR / 'test.sqlite'}",
+    DATA_DIR=str(_TMP_DIR / "data"),
+    WARMUP_ON_STARTUP="false",
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.init_db import init_db  # noqa: E402
+from app.db.session import SessionLocal, get_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.jobs import job_runner  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    """A freshly created and seeded database."""
+    shutil.rmtree(settings.DATA_DIR, ignore_errors=True)
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    shutil.copy(_BACKEND_DIR / "data" / settings.SAMPLE_DATA_FILE, settings.DATA_DIR)
+    Base.metadata.drop_all(bind=get_engine())
+    session = SessionLocal()
+    init_db(session)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+    # Shutdown leaves running jobs to finish; wait, so none writes into the next test's database
+    wait(list(job_runner._futures.values()), timeout=30)
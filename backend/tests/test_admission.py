@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from app.core import admission
+from app.core.admission import HEAVY, READ, WRITE, AdmissionController, AdmissionMiddleware, classify
+from app.core.config import settings
+
+
+@pytest.mark.parametrize("method, path, lane", [
+    ("POST", "/api/v1/jobs/", HEAVY),
+    ("POST", "/api/v1/jobs", HEAVY),
+    ("GET", "/api/v1/jobs/12", READ),
+    ("GET", "/api/v1/jobs/12/result", READ),
+    ("POST", "/api/v1/jobs/12/cancel", WRITE),
+    ("GET", "/api/v1/production/cumulative", HEAVY),
+    ("GET", "/api/v1/production/", READ),
+    ("PUT", "/api/v1/production/batch", WRITE),
+    ("GET", "/api/v1/dashboard", HEAVY),
+    ("GET", "/api/v1/production/stream", None),
+    ("GET", "/health/ready", None),
+])
+def test_classify(method, path, lane):
+    assert classify(method, path) == lane
+
+
+class _App:
+    """ASGI app whose requests block until released, recording the order they start in."""
+
+    def __init__(self):
+        self.started = []
+        self.gates = {}
+
+    async def __call__(self, scope, receive, send):
+        name = scope["name"]
+        self.started.append(name)
+        await self.gates.setdefault(name, asyncio.Event()).wait()
+        if name == "boom":
+            raise RuntimeError("handler failed")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    def release(self, name):
+        self.gates.setdefault(name, asyncio.Event()).set()
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    def configure(total=1, limit=1, queue=10, wait=5.0):
+        monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+        monkeypatch.setattr(settings, "ADMISSION_TOTAL_CONCURRENCY", total)
+        for setting, value in (("ADMISSION_LIMITS", limit), ("ADMISSION_QUEUE_SIZES", queue),
+                               ("ADMISSION_MAX_WAIT_SECONDS", wait)):
+            monkeypatch.setattr(settings, setting, {lane: value for lane in (READ, HEAVY, WRITE)})
+        monkeypatch.setattr(admission, "admission_controller", AdmissionController())
+        return admission.admission_controller
+    return configure
+
+
+PATHS = {READ: ("GET", "/api/v1/production/"), HEAVY: ("GET", "/api/v1/dashboard"), WRITE: ("POST", "/api/v1/production/")}
+
+
+async def _request(middleware, name, lane):
+    method, path = PATHS[lane]
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware({"type": "http", "method": method, "path": path, "name": name}, None, send)
+    start = sent[0]
+    return start["status"], dict(start["headers"])
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_queued_requests_are_admitted_by_priority(controller):
+    controller(total=1, limit=1)
+    app = _App()
+    middleware = AdmissionMiddleware(app)
+
+    async def scenario():
+        first = asyncio.create_task(_request(middleware, "first", READ))
+        await _settle()
+        waiting = [asyncio.create_task(_request(middleware, name, lane))
+                   for name, lane in (("heavy", HEAVY), ("read", READ), ("write", WRITE))]
+        await _settle()
+        assert app.started == ["first"]
+        for name in ("first", "write", "read", "heavy"):
+            app.release(name)
+        await asyncio.gather(first, *waiting)
+        assert app.started == ["first", "write", "read", "heavy"]
+
+    asyncio.run(scenario())
+
+
+def test_lane_limit_applies_within_the_total_budget(controller):
+    admission_controller = controller(total=2, limit=1)
+    app = _App()
+    middleware = AdmissionMiddleware(app)
+
+    async def scenario():
+        tasks = [asyncio.create_task(_request(middleware, "read-1", READ))]
+        await _settle()
+        tasks.append(asyncio.create_task(_request(middleware, "read-2", READ)))
+        tasks.append(asyncio.create_task(_request(middleware, "write", WRITE)))
+        await _settle()
+        # The read lane is full although the total budget has room; the write is not held up
+        assert app.started == ["read-1", "write"]
+        assert admission_controller.lanes[READ].queued == 1
+
+        app.release("write")
+        await _settle()
+        assert app.started == ["read-1", "write"]
+        app.release("read-1")
+        app.release("read-2")
+        await asyncio.gather(*tasks)
+        assert app.started == ["read-1", "write", "read-2"]
+        assert admission_controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_shed_with_retry_after(controller):
+    admission_controller = controller(total=1, limit=1, queue=1)
+    app = _App()
+    middleware = AdmissionMiddleware(app)
+
+    async def scenario():
+        tasks = [asyncio.create_task(_request(middleware, name, READ)) for name in ("running", "queued")]
+        await _settle()
+        status, headers = await _request(middleware, "shed", READ)
+        assert status == 503
+        assert headers[b"retry-after"] == str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()
+        assert "shed" not in app.started
+        assert admission_controller.lanes[READ].shed == 1
+        app.release("running")
+        app.release("queued")
+        assert [status for status, _ in await asyncio.gather(*tasks)] == [200, 200]
+
+    asyncio.run(scenario())
+
+
+def test_wait_timeout_is_shed_with_retry_after(controller):
+    admission_controller = controller(total=1, limit=1, wait=0.05)
+    app = _App()
+    middleware = AdmissionMiddleware(app)
+
+    async def scenario():
+        running = asyncio.create_task(_request(middleware, "running", READ))
+        await _settle()
+        status, headers = await _request(middleware, "late", READ)
+        assert status == 503
+        assert b"retry-after" in headers
+        assert admission_controller.lanes[READ].queued == 0
+        app.release("running")
+        await running
+
+    asyncio.run(scenario())
+
+
+def test_slot_is_released_when_the_handler_raises(controller):
+    admission_controller = controller(total=1, limit=1)
+    app = _App()
+    middleware = AdmissionMiddleware(app)
+
+    async def scenario():
+        app.release("boom")
+        with pytest.raises(RuntimeError):
+            await _request(middleware, "boom", WRITE)
+        assert admission_controller.in_flight == 0
+        assert admission_controller.lanes[WRITE].in_flight == 0
+        app.release("next")
+        assert (await _request(middleware, "next", WRITE))[0] == 200
+
+    asyncio.run(scenario())
@@ -0,0 +1,136 @@
+import asyncio
+from datetime import date
+
+from app.core.config import settings
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.services.broadcaster import Broadcaster, Subscription
+from app.services.changelog import latest_version
+from app.services.ingest import upsert_production, upsert_wells
+
+
+async def _next(subscription, timeout=5.0):
+    return await asyncio.wait_for(subscription.queue.get(), timeout)
+
+
+async def _close(feed, *subscriptions):
+    for subscription in subscriptions:
+        feed.unsubscribe(subscription)
+    # Let the tailer exit before the next test drops the tables
+    while feed._thread is not None:
+        await asyncio.sleep(0.01)
+
+
+def test_writes_outside_the_api_are_streamed(db, monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_POLL_SECONDS", 0.02)
+    feed = Broadcaster()
+
+    async def scenario():
+        dubai = Subscription(region="Dubai", since=latest_version(db))
+        abu_dhabi = Subscription(region="Abu Dhabi", since=latest_version(db))
+        feed.subscribe(dubai)
+        feed.subscribe(abu_dhabi)
+        try:
+            # The ingest daemon's write path, as another process would run it
+            rows = [{"well_name": "Well-2", "latitude": 25.2, "longitude": 55.3, "region": "Dubai",
+                     "date": date(2025, 4, 25), "oil_volume": 100.0}]
+            upsert_production(db, rows, upsert_wells(db, rows))
+            db.commit()
+
+            upsert = await _next(dubai)
+            assert upsert["type"] == "upsert"
+            assert upsert["row"]["well_name"] == "Well-2"
+            assert upsert["row"]["date"] == date(2025, 4, 25)
+            aggregates = await _next(dubai)
+            assert aggregates["type"] == "aggregates"
+            assert aggregates["totals"]["rows"] == 8
+            assert abu_dhabi.queue.empty()
+        finally:
+            await _close(feed, dubai, abu_dhabi)
+
+    asyncio.run(scenario())
+
+
+def test_region_change_resyncs_old_and_new_region(db, monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_POLL_SECONDS", 0.02)
+    feed = Broadcaster()
+
+    async def scenario():
+        dubai = Subscription(region="Dubai", since=latest_version(db))
+        sharjah = Subscription(region="Sharjah", since=latest_version(db))
+        feed.subscribe(dubai)
+        feed.subscribe(sharjah)
+        try:
+            well = db.query(Well).filter(Well.name == "Well-2").one()
+            rows = [{"well_name": "Well-2", "latitude": well.latitude, "longitude": well.longitude,
+                     "region": "Sharjah", "date": date(2025, 4, 24), "oil_volume": 50.0}]
+            upsert_wells(db, rows)
+            db.commit()
+
+            for subscription, rows_left in ((dubai, 0), (sharjah, 7)):
+                assert (await _next(subscription))["type"] == "resync"
+                aggregates = await _next(subscription)
+                assert aggregates["totals"]["rows"] == rows_left
+        finally:
+            await _close(feed, dubai, sharjah)
+
+    asyncio.run(scenario())
+
+
+def test_update_moving_a_row_deletes_the_old_key(client, db):
+    wells = {well.name: well.id for well in db.query(Well)}
+    created = client.post("/api/v1/production/", json={
+        "well_id": wells["Well-1"], "date": "2025-04-25", "oil_volume": 10.0,
+    })
+    assert created.status_code == 201, created.text
+    production = db.query(ProductionData).filter(
+        ProductionData.well_id == wells["Well-1"], ProductionData.date == date(2025, 4, 25)
+    ).one()
+    feed = Broadcaster()
+
+    async def scenario():
+        subscription = Subscription(since=latest_version(db))
+        feed._loop = asyncio.get_running_loop()
+        feed._subscriptions.add(subscription)
+        response = client.put(f"/api/v1/production/{production.id}", json={
+            "well_id": wells["Well-2"], "oil_volume": 10.0,
+        })
+        assert response.status_code == 200, response.text
+        feed.poll(subscription.since, {})
+        events = [await _next(subscription) for _ in range(3)]
+        assert [(event["type"], event.get("row", {}).get("well_name")) for event in events] == [
+            ("delete", "Well-1"),
+            ("upsert", "Well-2"),
+            ("aggregates", None),
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_late_subscriber_is_replayed_entries_the_tailer_already_passed(client, db):
+    wells = {well.name: well.id for well in db.query(Well)}
+    feed = Broadcaster()
+
+    async def scenario():
+        feed._loop = asyncio.get_running_loop()
+        early = Subscription(since=latest_version(db))
+        feed._subscriptions.add(early)
+        # The late client's snapshot is taken before the write, but it attaches after the tailer read it
+        late = Subscription(since=latest_version(db))
+        created = client.post("/api/v1/production/", json={
+            "well_id": wells["Well-1"], "date": "2025-04-25", "oil_volume": 10.0,
+        })
+        assert created.status_code == 201, created.text
+        version = feed.poll(early.since, {})
+        assert (await _next(early))["type"] == "upsert"
+        assert (await _next(early))["type"] == "aggregates"
+
+        feed._subscriptions.add(late)
+        assert feed.poll(version, {}) == version
+        upsert = await _next(late)
+        assert (upsert["type"], upsert["row"]["date"]) == ("upsert", date(2025, 4, 25))
+        assert (await _next(late))["type"] == "aggregates"
+        await asyncio.sleep(0)
+        assert early.queue.empty()
+
+    asyncio.run(scenario())
@@ -0,0 +1,57 @@
+from datetime import date
+
+from app.models.ingest import IngestCheckpoint
+from app.models.production import ProductionData
+from app.models.well import Well
+from app.services.ingest import REJECTED_DIR, ingest_file, ingest_root, ingest_status
+
+HEADER = "well_name,date,production_volume,latitude,longitude,region\n"
+
+
+def _drop(name, content):
+    root = ingest_root()
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / name
+    with open(path, "a") as f:
+        f.write(content)
+    return path
+
+
+def test_checkpoint_advances_over_complete_lines_only(db):
+    path = _drop("field.csv", HEADER + "Well-9,2025-04-25,10,24.1,54.1,Dubai\nWell-9,2025-04-26,1")
+    assert ingest_file(db, path) == (1, 0)
+    checkpoint = db.query(IngestCheckpoint).filter(IngestCheckpoint.path == "field.csv").one()
+    assert checkpoint.offset == path.stat().st_size - len("Well-9,2025-04-26,1")
+
+    status = ingest_status(db)
+    assert status["pending_bytes"] == 0
+    assert status["lag_seconds"] == 0.0
+
+    _drop("field.csv", "1,24.1,54.1,Dubai\n")
+    assert ingest_status(db)["pending_bytes"] == len("Well-9,2025-04-26,11,24.1,54.1,Dubai\n")
+    assert ingest_file(db, path) == (1, 0)
+    assert ingest_file(db, path) == (0, 0)
+    well = db.query(Well).filter(Well.name == "Well-9").one()
+    volumes = dict(db.query(ProductionData.date, ProductionData.oil_volume).filter(ProductionData.well_id == well.id))
+    assert volumes == {date(2025, 4, 25): 10.0, date(2025, 4, 26): 11.0}
+
+
+def test_retried_batch_does_not_duplicate_rejected_rows(db, monkeypatch):
+    path = _drop("field.csv", HEADER + "Well-9,2025-04-25,10,24.1,54.1,Dubai\nWell-9,not-a-date,5,24.1,54.1,Dubai\n")
+
+    def lose_connection():
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(db, "commit", lose_connection)
+    try:
+        ingest_file(db, path)
+    except RuntimeError:
+        db.rollback()
+    monkeypatch.undo()
+    assert ingest_file(db, path) == (1, 1)
+
+    rejected = list((ingest_root() / REJECTED_DIR).iterdir())
+    assert [file.name for file in rejected] == [f"field.csv.{len(HEADER)}.csv"]
+    lines = rejected[0].read_text().splitlines()
+    assert len(lines) == 2
+    assert "not-a-date" in lines[1]
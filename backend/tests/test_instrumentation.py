@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.db import instrumentation
+from app.db.instrumentation import clear_slow_queries, parameter_shapes, slow_queries
+
+
+@pytest.fixture
+def capture_all(monkeypatch):
+    """Treat every statement as slow, without plans unless a test enables them."""
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", False)
+    monkeypatch.setattr(instrumentation, "_explained_at", {})
+    clear_slow_queries()
+    yield
+    clear_slow_queries()
+
+
+def _plans_captured():
+    # The explain executor has one worker, so this waits for every plan queued before it
+    instrumentation._explainer.submit(lambda: None).result(timeout=10)
+
+
+def test_only_statements_over_the_threshold_are_kept(db, capture_all, monkeypatch):
+    db.execute(text("SELECT 1"))
+    assert slow_queries()[0]["statement"] == "SELECT 1"
+
+    clear_slow_queries()
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 60_000.0)
+    db.execute(text("SELECT 1"))
+    assert slow_queries() == []
+
+
+def test_buffer_keeps_the_most_recent_entries(db, capture_all):
+    size = settings.SLOW_QUERY_LOG_SIZE
+    for n in range(size + 5):
+        db.execute(text(f"SELECT {n}"))
+    entries = slow_queries()
+    assert len(entries) == size
+    assert entries[0]["statement"] == f"SELECT {size + 4}"
+
+
+def test_parameters_are_recorded_by_shape_only(db, capture_all):
+    db.execute(text("SELECT :name, :volume"), {"name": "Well-1", "volume": 12.5})
+    entry = slow_queries()[0]
+    assert entry["parameters"] in ({"name": "str", "volume": "float"}, ["str", "float"])
+    assert "Well-1" not in str(entry)
+
+    assert parameter_shapes((1, 2, 3, "a")) == ["int x3", "str"]
+    assert parameter_shapes([{"a": 1}, {"a": 2}], executemany=True) == {"executemany": 2, "row": {"a": "int"}}
+
+
+def test_entries_name_the_endpoint_that_issued_them(client, capture_all):
+    assert client.get("/api/v1/wells/").status_code == 200
+    assert any(entry["endpoint"] == "GET /api/v1/wells/" for entry in slow_queries())
+
+
+def test_slow_select_plan_is_captured(db, capture_all, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    db.execute(text("SELECT * FROM wells WHERE name = :name"), {"name": "Well-1"})
+    _plans_captured()
+    entry = next(entry for entry in slow_queries() if entry["statement"].startswith("SELECT * FROM wells"))
+    assert entry["plan"] and "wells" in entry["plan"]
+
+
+def test_with_statements_are_not_explained(db, capture_all, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    db.execute(text("WITH w AS (SELECT id FROM wells) SELECT count(*) FROM w"))
+    _plans_captured()
+    assert slow_queries()[0]["plan"] is None
+
+
+def test_failed_statement_does_not_skew_later_timings(db, capture_all):
+    with pytest.raises(OperationalError):
+        db.execute(text("SELECT * FROM no_such_table"))
+    db.rollback()
+    connection = db.connection()
+    connection.execute(text("SELECT 1"))
+    assert connection.info.get("query_start") == []
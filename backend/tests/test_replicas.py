@@ -0,0 +1,44 @@
+import time
+
+from app.db.replicas import ReplicaPool
+
+
+def _wait_checked(pool, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(replica.checked_at for replica in pool._ensure()):
+            return
+        time.sleep(0.01)
+    raise AssertionError("replicas were not checked")
+
+
+def test_unchecked_replicas_are_not_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(ReplicaPool, "_refresh_loop", lambda self: None)
+    pool = ReplicaPool([f"sqlite:///{tmp_path / 'replica.sqlite'}"])
+    assert pool.engine() is None
+
+
+def test_healthy_replicas_are_used_round_robin(tmp_path):
+    pool = ReplicaPool([f"sqlite:///{tmp_path / 'one.sqlite'}", f"sqlite:///{tmp_path / 'two.sqlite'}"])
+    _wait_checked(pool)
+    engines = {str(pool.engine().url) for _ in range(4)}
+    assert len(engines) == 2
+
+
+def test_failed_check_ejects_replica(tmp_path):
+    good = f"sqlite:///{tmp_path / 'good.sqlite'}"
+    pool = ReplicaPool([good, f"sqlite:///{tmp_path / 'missing' / 'bad.sqlite'}"])
+    _wait_checked(pool)
+    assert {str(pool.engine().url) for _ in range(4)} == {good}
+    assert [replica["healthy"] for replica in pool.status()] == [True, False]
+
+
+def test_requests_do_not_run_health_checks(tmp_path, monkeypatch):
+    pool = ReplicaPool([f"sqlite:///{tmp_path / 'replica.sqlite'}"])
+    _wait_checked(pool)
+
+    def fail(replica):
+        raise AssertionError("health check on the request path")
+
+    monkeypatch.setattr(pool, "_check", fail)
+    assert pool.engine() is not None
@@ -0,0 +1,44 @@
+import time
+from threading import Event, Thread
+
+from app.services.singleflight import SingleFlight
+
+
+def _start_leader(flight, key):
+    started, release = Event(), Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    leader = Thread(target=flight.do, args=(key, slow))
+    leader.start()
+    started.wait(5)
+    return leader, release
+
+
+def test_identical_calls_share_the_call_in_flight():
+    flight = SingleFlight()
+    leader, release = _start_leader(flight, "key")
+    results = []
+    follower = Thread(target=lambda: results.append(flight.do("key", lambda: "own")))
+    follower.start()
+    while flight.metrics()["shared"] == 0:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+    assert results == ["stale"]
+    assert flight.metrics() == {"in_flight": 0, "executed": 1, "shared": 1}
+
+
+def test_unshared_calls_never_join_a_call_in_flight():
+    flight = SingleFlight()
+    leader, release = _start_leader(flight, "key")
+    try:
+        assert flight.do("key", lambda: "own", share=False) == "own"
+    finally:
+        release.set()
+        leader.join()
+    assert flight.metrics()["shared"] == 0
@@ -0,0 +1,95 @@
+from datetime import date
+
+from app.api.v1.endpoints.production import delete_production_data, update_production_data
+from app.api.v1.endpoints.wells import update_well
+from app.models.production import ProductionData
+from app.models.sketch import ProductionSketch, ProductionSketchDelta
+from app.schemas.production import ProductionDataUpdate
+from app.schemas.well import WellUpdate
+from app.services.jobs import _schedules
+from app.services.sketches import (
+    distribution,
+    mark_stale,
+    merge_sketch_deltas,
+    rebuild_sketches,
+    record_samples,
+    sketches_are_stale,
+)
+
+
+def test_new_rows_are_counted_before_and_after_merge(db):
+    before = distribution(db, ["Dubai"])
+    record_samples(db, [("Dubai", date(2025, 4, 25), 2, 900.0), ("Dubai", date(2025, 5, 1), 2, 0.0)])
+    db.commit()
+    assert db.query(ProductionSketchDelta).filter(ProductionSketchDelta.region == "Dubai").count() >= 2
+
+    pending = distribution(db, ["Dubai"])
+    assert pending["samples"] == before["samples"] + 2
+    merge_sketch_deltas(db)
+    assert db.query(ProductionSketchDelta).count() == 0
+    merged = distribution(db, ["Dubai"])
+    assert merged["samples"] == pending["samples"]
+    assert merged["producing_wells"] == pending["producing_wells"] == 1
+    assert merged["quantiles"] == pending["quantiles"]
+
+
+def test_writers_do_not_touch_merged_sketches(db):
+    merge_sketch_deltas(db)
+    row = db.query(ProductionSketch).filter(ProductionSketch.region == "Dubai").one()
+    merged = (row.oil_quantiles, row.updated_at)
+    record_samples(db, [("Dubai", date(2025, 4, 25), 2, 900.0)])
+    db.commit()
+    db.refresh(row)
+    assert (row.oil_quantiles, row.updated_at) == merged
+
+
+def test_rebuild_counts_pending_rows_once(db):
+    record_samples(db, [("Dubai", date(2025, 4, 25), 2, 900.0)])
+    db.commit()
+    rebuild_sketches(db)
+    assert db.query(ProductionSketchDelta).count() == 0
+    # The sample was not backed by a production row, so only the 7 seeded days remain
+    assert distribution(db, ["Dubai"])["samples"] == 7
+
+
+def test_stale_sketches_are_scheduled_for_rebuild(db):
+    rebuild_sketches(db)
+    assert not sketches_are_stale(db)
+    mark_stale(db, ["Dubai"])
+    db.commit()
+    assert sketches_are_stale(db)
+    assert any(
+        schedule.job_type == "rebuild_sketches" and schedule.params == {"stale_only": True}
+        for schedule in _schedules
+    )
+
+
+def test_deleting_an_unmerged_row_marks_its_month_stale(db):
+    # Right after seeding the month's samples are all still pending deltas. Endpoints are
+    # called directly: the app's scheduled merges would race the rebuild on SQLite
+    production = db.query(ProductionData).filter(ProductionData.well_id == 2).first()
+    delete_production_data(db=db, production_id=production.id)
+    assert sketches_are_stale(db)
+    merge_sketch_deltas(db)
+    rebuild_sketches(db, stale_only=True)
+    assert distribution(db, ["Dubai"])["samples"] == 6
+    assert not sketches_are_stale(db)
+
+
+def test_moving_a_row_to_another_month_samples_it_there(db):
+    production = db.query(ProductionData).filter(ProductionData.well_id == 2).first()
+    update_production_data(db=db, production_id=production.id, production_in=ProductionDataUpdate(date=date(2025, 6, 1)))
+    june = distribution(db, ["Dubai"], date(2025, 6, 1), date(2025, 6, 30))
+    assert june["samples"] == 1
+    rebuild_sketches(db, stale_only=True)
+    assert distribution(db, ["Dubai"], date(2025, 4, 1), date(2025, 4, 30))["samples"] == 6
+
+
+def test_region_change_marks_both_regions_stale(db):
+    rebuild_sketches(db)
+    update_well(db=db, well_id=2, well_in=WellUpdate(region="Sharjah"))
+    assert db.query(ProductionSketch).filter(ProductionSketch.region == "Dubai").one().stale
+    rebuild_sketches(db, stale_only=True)
+    assert distribution(db, ["Dubai"])["samples"] == 0
+    assert distribution(db, ["Sharjah"])["samples"] == 7
+    assert not sketches_are_stale(db)